@@ -6,7 +6,6 @@ a = Analysis(['fifteen.py'],
              runtime_hooks=None)
 a.datas+=[('data/bg3.png', 'data/bg3.png', 'DATA')]
 a.datas+=[('data/loadscreen.png','data/loadscreen.png', 'DATA')]
-a.datas += [('data/fifteen2.png', 'data/fifteen2.png', 'DATA')]             
 pyz = PYZ(a.pure)
 exe = EXE(pyz,
           a.scripts,
@@ -0,0 +1,125 @@
+"""
+Anytime solver for boards too large for optimal search
+
+Starts from the greedy macro solution, shortened, and runs beam searches of
+doubling width, each bounded by the best solution so far, until a
+wall-clock deadline or a limit on stored states is reached.  Every
+completed search that beats the incumbent replaces it, so stopping at
+any point returns the shortest solution found.
+
+A beam search keeps only the most promising states (by Manhattan
+distance) at each depth; the Manhattan distance is also a lower bound,
+so states that cannot beat the incumbent are pruned.
+"""
+
+import time
+from array import array
+
+import boards, search
+from shorten import shorten
+from packed import array_typecode
+from moves import neighbors
+
+COMPLETE, TRUNCATED, BUDGET = "complete", "truncated", "budget"
+
+DEFAULT_SECONDS = 1.0
+DEFAULT_MAX_STATES = 2000000
+FIRST_WIDTH = 64
+
+def _distances(height, width):
+    """
+    Manhattan distance of every tile from every cell
+    Returns a list of lists, indexed by tile then cell
+    """
+    table = [[0] * (height * width)]
+    for tile in range(1, height * width):
+        goal_row, goal_col = divmod(tile, width)
+        table.append([abs(cell // width - goal_row) +
+                      abs(cell % width - goal_col)
+                      for cell in range(height * width)])
+    return table
+
+def beam_search(height, width, board, beam_width, bound, deadline=None,
+                max_states=None):
+    """
+    Beam search for a solution shorter than bound
+    Returns (move string or None, status); status is COMPLETE if no
+    state was dropped, so the result is optimal or proves nothing
+    shorter than bound exists, BUDGET if a budget ran out, and
+    TRUNCATED otherwise
+    """
+    distance = _distances(height, width)
+    moves = neighbors(height, width)
+    typecode = array_typecode(height * width)
+    start = array(typecode, board)
+    estimate = sum(distance[tile][cell] for cell, tile in enumerate(board))
+    if estimate == 0:
+        return "", COMPLETE
+    layer = [(estimate, start, start.index(0), None)]
+    seen = set([start.tobytes()])
+    status = COMPLETE
+    depth = 0
+    while layer:
+        depth += 1
+        following = []
+        for estimate, state, blank, path in layer:
+            for direction, cell in moves[blank]:
+                tile = state[cell]
+                child = (estimate + distance[tile][blank] -
+                         distance[tile][cell])
+                if depth + child >= bound:
+                    continue
+                values = array(typecode, state)
+                values[blank] = tile
+                values[cell] = 0
+                key = values.tobytes()
+                if key in seen:
+                    continue
+                if child == 0:
+                    #path is a linked list of (direction, parent) pairs
+                    found = [direction]
+                    while path is not None:
+                        found.append(path[0])
+                        path = path[1]
+                    return "".join(reversed(found)), status
+                seen.add(key)
+                following.append((child, values, cell, (direction, path)))
+        if deadline is not None and time.time() > deadline:
+            return None, BUDGET
+        if max_states is not None and len(seen) > max_states:
+            return None, BUDGET
+        if len(following) > beam_width:
+            following.sort(key=lambda entry: entry[0])
+            del following[beam_width:]
+            status = TRUNCATED
+        layer = following
+    return None, status
+
+def solve_anytime(puzzle, seconds=DEFAULT_SECONDS,
+                  max_states=DEFAULT_MAX_STATES, callback=None):
+    """
+    Shortest solution found for a Puzzle within the budgets; leaves
+    the puzzle untouched.  callback, if given, is called with each
+    improved move string as it is found
+    Returns a string
+    """
+    deadline = time.time() + seconds
+    height, width = puzzle.get_height(), puzzle.get_width()
+    board = search.flatten(puzzle)
+    assert boards.is_solvable(height, width, board), "puzzle is not solvable"
+    best = shorten(puzzle.clone().solve_puzzle())
+    if callback is not None:
+        callback(best)
+    beam_width = FIRST_WIDTH
+    while best and time.time() < deadline:
+        moves, status = beam_search(height, width, board, beam_width,
+                                    len(best), deadline, max_states)
+        if moves is not None:
+            best = moves
+            if callback is not None:
+                callback(best)
+        if status != TRUNCATED:
+            #either nothing shorter exists or a wider beam cannot fit
+            break
+        beam_width *= 2
+    return best
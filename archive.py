@@ -0,0 +1,285 @@
+"""
+Binary archive of boards and their solutions
+
+Each record holds a board as a PackedState key (8 bytes up to 4x4,
+one or two bytes per cell beyond) and its moves at 2 bits each, four
+to a byte, so a record costs a small fraction of its JSON form.  An
+offset index at the end of the file lets a reader memory-map the
+archive and fetch record k directly.
+
+    with ArchiveWriter("solved.farc") as out:
+        out.add(puzzle, puzzle.clone().solve_puzzle())
+
+    archive = ArchiveReader("solved.farc")
+    puzzle, moves = archive.get_puzzle(12345), archive.get_moves(12345)
+
+Layout, little-endian: a header (magic, version, record count, index
+offset), the records, then one 8-byte offset per record.  A record is
+the board's index in the input it came from, height, width and move
+count, followed by the board and the moves; pack skips boards without
+a solution, so the stored index is what ties a record back to its
+board.
+
+    python archive.py pack boards.jsonl solutions.jsonl out.farc
+    python archive.py unpack out.farc > solutions.jsonl
+"""
+
+import sys, json, mmap, struct, argparse
+from array import array
+
+from packed import PackedState, array_typecode
+from moves import MoveRuns
+import batch
+
+MAGIC = b"FARC"
+VERSION = 2
+HEADER = struct.Struct("<4sHxxQQ")
+RECORD = struct.Struct("<QHHI")
+NIBBLES = struct.Struct("<Q")
+
+DIRECTIONS = "lrud"
+#four moves <-> the byte holding them, first move in the low bits
+_DECODE = ["".join(DIRECTIONS[(byte >> shift) & 3] for shift in (0, 2, 4, 6))
+           for byte in range(256)]
+_ENCODE = dict((moves, byte) for byte, moves in enumerate(_DECODE))
+
+def pack_moves(move_string):
+    """
+    Moves at 2 bits each, padded with "l" to a whole byte
+    Returns bytes
+    """
+    padded = move_string + "l" * (-len(move_string) % 4)
+    try:
+        return bytes(bytearray(_ENCODE[padded[idx:idx + 4]]
+                               for idx in range(0, len(padded), 4)))
+    except KeyError:
+        assert False, "invalid direction in moves"
+
+def unpack_moves(data, count):
+    """
+    First count moves of pack_moves output
+    Returns a string
+    """
+    return "".join([_DECODE[byte] for byte in bytearray(data)])[:count]
+
+def _board_size(height, width):
+    """
+    Bytes taken by a packed board
+    Returns an integer
+    """
+    if height * width <= 16:
+        return NIBBLES.size
+    return height * width * array(array_typecode(height * width)).itemsize
+
+def _little_endian(data, num_cells):
+    """
+    Array board bytes converted between native and little-endian order
+    Returns bytes
+    """
+    if sys.byteorder == "little":
+        return bytes(data)
+    tiles = array(array_typecode(num_cells))
+    tiles.frombytes(bytes(data))
+    tiles.byteswap()
+    return tiles.tobytes()
+
+def _pack_board(state):
+    """
+    Board bytes of a PackedState
+    Returns bytes
+    """
+    key = state.key()
+    if isinstance(key, bytes):
+        return _little_endian(key, state.get_height() * state.get_width())
+    return NIBBLES.pack(key)
+
+def _unpack_board(height, width, data):
+    """
+    PackedState from board bytes
+    Returns a PackedState
+    """
+    if height * width <= 16:
+        return PackedState.from_key(height, width, NIBBLES.unpack(data)[0])
+    return PackedState.from_key(height, width,
+                                _little_endian(data, height * width))
+
+class ArchiveWriter(object):
+    """
+    Appends records to a new archive file
+    """
+
+    def __init__(self, path):
+        """
+        Create or truncate the archive at path
+        """
+        self._out = open(path, "wb")
+        self._out.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        self._offsets = array("Q")
+        self._position = HEADER.size
+
+    def add(self, board, moves, index=None):
+        """
+        Append a record; board is a Puzzle, PackedState or grid, moves
+        a move string or MoveRuns and index the board's position in its
+        input, by default the record's own position
+        """
+        if index is None:
+            index = len(self._offsets)
+        if isinstance(board, list):
+            state = PackedState.from_grid(board)
+        elif isinstance(board, PackedState):
+            state = board
+        else:
+            state = PackedState.from_puzzle(board)
+        if isinstance(moves, MoveRuns):
+            moves = str(moves)
+        data = (RECORD.pack(index, state.get_height(), state.get_width(),
+                            len(moves)) +
+                _pack_board(state) + pack_moves(moves))
+        self._offsets.append(self._position)
+        self._out.write(data)
+        self._position += len(data)
+
+    def close(self):
+        """
+        Write the index and header and close the file
+        """
+        if self._out is None:
+            return
+        offsets = self._offsets
+        if sys.byteorder == "big":
+            offsets = array("Q", offsets)
+            offsets.byteswap()
+        self._out.write(offsets.tobytes())
+        self._out.seek(0)
+        self._out.write(HEADER.pack(MAGIC, VERSION, len(self._offsets),
+                                    self._position))
+        self._out.close()
+        self._out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ArchiveReader(object):
+    """
+    Random access to the records of a memory-mapped archive
+    """
+
+    def __init__(self, path):
+        """
+        Map the archive at path
+        """
+        with open(path, "rb") as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index = HEADER.unpack_from(self._map, 0)
+        assert magic == MAGIC and version == VERSION, "bad archive: " + path
+        self._count = count
+        self._index = index
+        self._view = memoryview(self._map)
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, record):
+        """
+        File offset of a record
+        Returns an integer
+        """
+        assert 0 <= record < self._count, "no record %d" % record
+        return struct.unpack_from("<Q", self._map,
+                                  self._index + 8 * record)[0]
+
+    def get(self, record):
+        """
+        Board and moves of a record
+        Returns (PackedState, move string)
+        """
+        offset = self._offset(record)
+        dummy, height, width, count = RECORD.unpack_from(self._map, offset)
+        offset += RECORD.size
+        size = _board_size(height, width)
+        state = _unpack_board(height, width,
+                              self._view[offset:offset + size])
+        offset += size
+        moves = unpack_moves(self._view[offset:offset + (count + 3) // 4],
+                             count)
+        return state, moves
+
+    def get_puzzle(self, record):
+        """
+        Returns a Puzzle holding a record's board
+        """
+        return self.get(record)[0].to_puzzle()
+
+    def get_moves(self, record):
+        """
+        Returns a record's move string
+        """
+        offset = self._offset(record)
+        dummy, height, width, count = RECORD.unpack_from(self._map, offset)
+        offset += RECORD.size + _board_size(height, width)
+        return unpack_moves(self._view[offset:offset + (count + 3) // 4],
+                            count)
+
+    def get_index(self, record):
+        """
+        Returns the index of a record's board in the input it was
+        packed from
+        """
+        return RECORD.unpack_from(self._map, self._offset(record))[0]
+
+    def __getitem__(self, record):
+        return self.get(record)
+
+    def __iter__(self):
+        for record in range(self._count):
+            yield self.get(record)
+
+    def close(self):
+        """
+        Unmap the archive
+        """
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="board/solution archives")
+    commands = parser.add_subparsers(dest="command")
+    pack = commands.add_parser("pack", help="archive batch.py results, "
+                               "skipping boards that have no solution")
+    pack.add_argument("boards", help="JSON lines of grids")
+    pack.add_argument("solutions", help="batch.py output for the boards")
+    pack.add_argument("archive")
+    unpack = commands.add_parser("unpack", help="print records as JSON")
+    unpack.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        with open(args.boards) as boards, open(args.solutions) as solutions:
+            with ArchiveWriter(args.archive) as out:
+                for index, grid, result in batch.pair_results(boards,
+                                                              solutions):
+                    if (grid is not None and result is not None and
+                            "moves" in result):
+                        out.add(grid, result["moves"], index)
+    elif args.command == "unpack":
+        with ArchiveReader(args.archive) as archive:
+            for record, (state, moves) in enumerate(archive):
+                index = archive.get_index(record)
+                sys.stdout.write(json.dumps({"index": index,
+                                             "grid": state.to_grid(),
+                                             "moves": moves}) + "\n")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
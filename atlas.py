@@ -0,0 +1,138 @@
+"""
+Generated tile atlases for the GUI
+
+The tiles of a board are drawn once, for its size and tile pixel size,
+into a single image laid out as a near-square grid, and saved under
+data/ so later runs load one PNG instead of drawing again.  Labels are
+composed from digit glyphs rendered once per atlas, so drawing even a
+100x100 board's atlas takes a few font renders.
+
+    tiles = atlas.load_tiles(30, 30, atlas.tile_size_for(30, 30))
+
+Tile 0, the blank, is left transparent.  This module works under both
+the GUI's Python and the solver's.
+"""
+
+import os
+import pygame
+
+#largest tile and board in pixels; bigger boards get smaller tiles
+TILE_SIZE = 100
+MIN_TILE_SIZE = 8
+MAX_BOARD_PIXELS = 800
+
+TILE_COLOR = (255, 255, 240)
+EDGE_COLOR = (255, 255, 207)
+TEXT_COLOR = (0, 0, 0)
+
+def tile_size_for(height, width):
+    """
+    Tile size in pixels that keeps a board within MAX_BOARD_PIXELS
+    Returns an integer
+    """
+    fit = MAX_BOARD_PIXELS // max(height, width)
+    return max(MIN_TILE_SIZE, min(TILE_SIZE, fit))
+
+def default_path(height, width, tile_size):
+    """
+    Location of the cached atlas for a board size and tile size
+    Returns a string
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data",
+                        "atlas-%dx%d-%d.png" % (height, width, tile_size))
+
+def _layout(num_tiles):
+    """
+    Columns and rows of the atlas grid
+    Returns (columns, rows)
+    """
+    columns = 1
+    while columns * columns < num_tiles:
+        columns += 1
+    return columns, (num_tiles + columns - 1) // columns
+
+def _digits(largest, tile_size):
+    """
+    Glyphs for 0-9 at a font size that fits the largest label across
+    most of a tile
+    Returns a list of surfaces
+    """
+    if not pygame.font.get_init():
+        pygame.font.init()
+    size = max(6, tile_size // 2)
+    while True:
+        font = pygame.font.Font(None, size)
+        glyphs = [font.render(str(digit), True, TEXT_COLOR)
+                  for digit in range(10)]
+        widest = max(glyph.get_width() for glyph in glyphs)
+        if widest * len(str(largest)) <= tile_size * 4 // 5 or size <= 6:
+            return glyphs
+        size = max(6, size * tile_size * 4 // (5 * widest *
+                                               len(str(largest))))
+
+def render_atlas(height, width, tile_size):
+    """
+    Draw every tile of a height x width board
+    Returns a surface with per-pixel alpha
+    """
+    num_tiles = height * width
+    columns, rows = _layout(num_tiles)
+    surface = pygame.Surface((columns * tile_size, rows * tile_size),
+                             pygame.SRCALPHA, 32)
+    glyphs = _digits(num_tiles - 1, tile_size)
+    gap = max(1, tile_size // 50)
+    for tile in range(1, num_tiles):
+        left = (tile % columns) * tile_size
+        top = (tile // columns) * tile_size
+        rect = pygame.Rect(left + gap, top + gap, tile_size - 2 * gap,
+                           tile_size - 2 * gap)
+        surface.fill(TILE_COLOR, rect)
+        pygame.draw.rect(surface, EDGE_COLOR, rect, gap)
+        label = [glyphs[int(digit)] for digit in str(tile)]
+        x_pos = left + (tile_size - sum(glyph.get_width()
+                                        for glyph in label)) // 2
+        y_pos = top + (tile_size - label[0].get_height()) // 2
+        for glyph in label:
+            surface.blit(glyph, (x_pos, y_pos))
+            x_pos += glyph.get_width()
+    return surface
+
+def load_atlas(height, width, tile_size, path=None):
+    """
+    Atlas from the cache file at path, drawn and saved there first if
+    missing or stale; converted for the display once one is set
+    Returns a surface
+    """
+    path = path or default_path(height, width, tile_size)
+    columns, rows = _layout(height * width)
+    surface = None
+    if os.path.exists(path):
+        try:
+            surface = pygame.image.load(path)
+        except pygame.error:
+            surface = None
+        if (surface is not None and
+                surface.get_size() != (columns * tile_size, rows * tile_size)):
+            surface = None
+    if surface is None:
+        surface = render_atlas(height, width, tile_size)
+        try:
+            pygame.image.save(surface, path)
+        except (pygame.error, IOError, OSError):
+            #a read-only install still works, it just draws every time
+            pass
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha()
+    return surface
+
+def load_tiles(height, width, tile_size, path=None):
+    """
+    One surface per tile value, cut from the board's atlas
+    Returns a list of subsurfaces indexed by tile value
+    """
+    surface = load_atlas(height, width, tile_size, path)
+    columns = _layout(height * width)[0]
+    return [surface.subsurface(((tile % columns) * tile_size,
+                                (tile // columns) * tile_size,
+                                tile_size, tile_size))
+            for tile in range(height * width)]
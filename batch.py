@@ -0,0 +1,207 @@
+"""
+Batch solver for the Fifteen puzzle
+
+Reads boards as JSON lines, one grid (a list of rows) per line, solves
+them with Puzzle.solve_puzzle across a process pool and streams one
+JSON result per line:
+
+    {"index": 0, "moves": "rrdd...", "length": 188, "seconds": 0.0003}
+
+Boards that cannot be solved get an "error" field instead of moves.
+With --cache, workers share a sqlite solution cache so repeated boards
+are only solved once, and --shorten runs solutions through shorten.py.
+Only a bounded number of chunks is in flight at once, so memory stays
+flat however long the input is.
+
+    python batch.py boards.jsonl -o solutions.jsonl --workers 4
+"""
+
+import os, sys, json, time, argparse, itertools, collections
+from concurrent import futures
+
+from fifteen import Puzzle
+from cache import SolutionCache
+from shorten import shorten
+
+#per worker process solution cache, opened on first use
+_CACHES = {}
+
+def grid_error(grid):
+    """
+    Why grid is not a board, which must be a non-empty list of
+    equal-length, non-empty lists
+    Returns an error message, or None for a well-formed grid
+    """
+    if not isinstance(grid, list) or not grid:
+        return "grid must be a non-empty list of rows"
+    if not all(isinstance(row, list) for row in grid) or not grid[0]:
+        return "grid rows must be non-empty lists"
+    if any(len(row) != len(grid[0]) for row in grid):
+        return "grid rows must all have the same length"
+    return None
+
+def error_message(error):
+    """
+    Readable description of an exception raised solving a board; a
+    bare KeyError would otherwise read as just the missing key
+    Returns a string
+    """
+    if isinstance(error, KeyError):
+        return "%s: %s" % (error.__class__.__name__, error)
+    return str(error) or error.__class__.__name__
+
+def solve_grid(grid, mode="greedy", cache_path=None, post=False):
+    """
+    Solve one board, through the solution cache at cache_path if given,
+    and shorten the solution if post is set
+    Returns a result dictionary without the index
+    """
+    start = time.time()
+    error = grid_error(grid)
+    if error is not None:
+        return {"error": error}
+    try:
+        puzzle = Puzzle(len(grid), len(grid[0]), grid)
+        if cache_path is None:
+            moves = puzzle.solve_puzzle(mode)
+        else:
+            if cache_path not in _CACHES:
+                _CACHES[cache_path] = SolutionCache(path=cache_path)
+            moves = _CACHES[cache_path].solve(puzzle, mode)
+        if post:
+            moves = shorten(moves)
+    except (AssertionError, IndexError, KeyError, TypeError,
+            ValueError) as error:
+        return {"error": error_message(error)}
+    return {"moves": moves, "length": len(moves),
+            "seconds": time.time() - start}
+
+def solve_chunk(chunk, mode, cache_path=None, post=False):
+    """
+    Worker task: solve a list of (index, line) pairs
+    Returns a list of result dictionaries
+    """
+    results = []
+    for index, line in chunk:
+        try:
+            grid = json.loads(line)
+        except ValueError as error:
+            result = {"error": "bad json: " + str(error)}
+        else:
+            result = solve_grid(grid, mode, cache_path, post)
+        result["index"] = index
+        results.append(result)
+    return results
+
+def read_chunks(lines, chunk_size):
+    """
+    Group non-blank input lines into numbered chunks
+    Yields lists of (index, line) pairs
+    """
+    numbered = enumerate(line for line in lines if line.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def solve_stream(lines, workers=None, mode="greedy", chunk_size=64,
+                 max_inflight=None, ordered=True, cache_path=None,
+                 post=False):
+    """
+    Solve a stream of JSON grid lines on a process pool
+    At most max_inflight chunks are queued or running at once; results
+    keep input order unless ordered is False
+    Yields result dictionaries
+    """
+    workers = workers or os.cpu_count() or 1
+    limit = max_inflight or 2 * workers
+    with futures.ProcessPoolExecutor(workers) as pool:
+        pending = collections.deque()
+        for chunk in read_chunks(lines, chunk_size):
+            if len(pending) >= limit:
+                for result in _drain(pending, ordered):
+                    yield result
+            pending.append(pool.submit(solve_chunk, chunk, mode, cache_path,
+                                       post))
+        while pending:
+            for result in _drain(pending, ordered):
+                yield result
+
+def _drain(pending, ordered):
+    """
+    Wait for the oldest chunk (ordered) or any chunk to finish and
+    remove it from pending
+    Returns a list of result dictionaries
+    """
+    if ordered:
+        return pending.popleft().result()
+    done, dummy_running = futures.wait(pending,
+                                       return_when=futures.FIRST_COMPLETED)
+    results = []
+    for future in done:
+        pending.remove(future)
+        results.extend(future.result())
+    return results
+
+def pair_results(board_lines, result_lines):
+    """
+    Match results to the boards they were solved from by index; the
+    results may be in any order; a board line that is not JSON gets
+    grid None
+    Yields (index, grid, result dictionary or None) triples
+    """
+    result_lines = iter(result_lines)
+    pending = {}
+    boards = (line for line in board_lines if line.strip())
+    for index, grid_line in enumerate(boards):
+        while index not in pending:
+            line = next(result_lines, None)
+            if line is None:
+                break
+            if line.strip():
+                result = json.loads(line)
+                pending[result["index"]] = result
+        try:
+            grid = json.loads(grid_line)
+        except ValueError:
+            grid = None
+        yield index, grid, pending.pop(index, None)
+
+def main():
+    parser = argparse.ArgumentParser(description="solve boards in bulk")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="JSON lines file of grids, - for stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSON lines file for results, - for stdout")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--mode", default="greedy",
+                        help="solve_puzzle mode: greedy, optimal or anytime")
+    parser.add_argument("--chunk", type=int, default=64,
+                        help="boards per worker task")
+    parser.add_argument("--max-inflight", type=int, default=None,
+                        help="chunks queued at once (default: 2 x workers)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="emit results as they complete")
+    parser.add_argument("--cache", default=None,
+                        help="sqlite file caching solutions across runs")
+    parser.add_argument("--shorten", action="store_true",
+                        help="post-optimize solutions with shorten.py")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in solve_stream(source, args.workers, args.mode, args.chunk,
+                                   args.max_inflight, not args.unordered,
+                                   args.cache, args.shorten):
+            out.write(json.dumps(result, sort_keys=True) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark for the GUI's tile atlases
+
+For each board size, times drawing the atlas and saving it (a first
+run) against loading the cached file (every later run), on SDL's dummy
+video driver so no window opens.  Cache files go to a temporary
+directory, leaving data/ alone.
+
+    python benchmarks/bench_atlas.py [--sizes 4x4 30x30 100x100]
+"""
+
+import os, sys, time, shutil, argparse, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import atlas
+
+def main():
+    parser = argparse.ArgumentParser(description="tile atlas load times")
+    parser.add_argument("--sizes", nargs="+",
+                        default=["4x4", "10x10", "30x30", "100x100"])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    pygame.init()
+    directory = tempfile.mkdtemp()
+    try:
+        for size in args.sizes:
+            height, width = [int(dim) for dim in size.split("x")]
+            tile_size = atlas.tile_size_for(height, width)
+            pygame.display.set_mode((width * tile_size, height * tile_size))
+            path = os.path.join(directory, "%s.png" % size)
+            start = time.time()
+            atlas.load_tiles(height, width, tile_size, path)
+            drawn = time.time() - start
+            cached = []
+            for dummy_idx in range(args.runs):
+                start = time.time()
+                atlas.load_tiles(height, width, tile_size, path)
+                cached.append(time.time() - start)
+            print("%-8s %3d px tiles   draw %7.2f ms   cached %7.2f ms" % (
+                size, tile_size, 1e3 * drawn, 1e3 * min(cached)))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark for tile lookups during solve_puzzle
+
+Compares the indexed current_position against the original full-grid
+scan on large boards.  The solver looks a tile up once per placement in
+the lower rows and once per macro in the top two, so with the index
+time per move stays flat as the board grows, while the scan adds work
+in proportion to the number of cells for every tile.  Each board is
+solved once untimed first, so the planner's plan cache is warm for
+both rows rather than billed to the first.
+
+    python benchmarks/bench_lookup.py [--sizes 20x20,50x50] [--walk N]
+"""
+
+import os, sys, time, random, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boards
+from fifteen import Puzzle
+
+class ScanPuzzle(Puzzle):
+    """
+    Puzzle using the original O(cells) scan in current_position
+    """
+
+    def current_position(self, solved_row, solved_col):
+        """
+        Locate tile by scanning the whole grid
+        """
+        solved_value = (solved_col + self._width * solved_row)
+        for row in range(self._height):
+            for col in range(self._width):
+                if self._grid[row][col] == solved_value:
+                    return (row, col)
+        assert False, "Value " + str(solved_value) + " not found"
+
+def time_solve(puzzle_class, grid):
+    """
+    Solve a copy of grid with puzzle_class
+    Returns (moves, seconds)
+    """
+    puzzle = puzzle_class(len(grid), len(grid[0]), grid)
+    start = time.time()
+    solution = puzzle.solve_puzzle()
+    return len(solution), time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", default="20x20,50x50",
+                        help="comma separated HxW board sizes")
+    parser.add_argument("--walk", type=int, default=0,
+                        help="random walk length (default 50 * cells)")
+    parser.add_argument("--seed", type=int, default=15)
+    parser.add_argument("--no-scan", action="store_true",
+                        help="skip the slow full-scan reference")
+    args = parser.parse_args()
+
+    print("%-8s %-8s %10s %10s %12s" % ("size", "lookup", "moves",
+                                        "seconds", "us/move"))
+    for size in args.sizes.split(","):
+        height, width = [int(dim) for dim in size.split("x")]
+        walk = args.walk or 50 * height * width
+        grid = boards.scrambled_grid(height, width, walk,
+                                     random.Random(args.seed))
+        #warm planner._PLANS for this size
+        Puzzle(height, width, grid).solve_puzzle()
+        classes = [("index", Puzzle)]
+        if not args.no_scan:
+            classes.append(("scan", ScanPuzzle))
+        for name, puzzle_class in classes:
+            moves, seconds = time_solve(puzzle_class, grid)
+            print("%-8s %-8s %10d %10.3f %12.3f" % (
+                size, name, moves, seconds, 1e6 * seconds / max(moves, 1)))
+
+if __name__ == "__main__":
+    main()
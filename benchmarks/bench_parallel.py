@@ -0,0 +1,48 @@
+"""
+Benchmark for the parallel optimal solver
+
+Times search.parallel_ida_star on fixed-seed boards for several worker
+counts against the single process ida_star, and checks every run finds
+a solution of the same length.  Build the pattern database first
+(python patterndb.py) or 4x4 boards will take very long.
+
+    python benchmarks/bench_parallel.py [--size 4x4] [--workers 1,2,4,8]
+"""
+
+import os, sys, time, random, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boards, search
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--size", default="4x4", help="board size HxW")
+    parser.add_argument("--boards", type=int, default=5)
+    parser.add_argument("--workers", default="1,2,4,8",
+                        help="comma separated worker counts")
+    parser.add_argument("--seed", type=int, default=2)
+    args = parser.parse_args()
+
+    height, width = [int(dim) for dim in args.size.split("x")]
+    counts = [int(count) for count in args.workers.split(",")]
+    rng = random.Random(args.seed)
+    print("%-6s %8s %10s %8s" % ("board", "workers", "seconds", "speedup"))
+    for index in range(args.boards):
+        values = boards.random_values(height, width, rng)
+        start = time.time()
+        heuristic = search.default_heuristic(height, width)
+        length = len(search.ida_star(height, width, values, heuristic))
+        serial = time.time() - start
+        print("%-6d %8s %10.3f %8s  (%d moves)" % (index, "serial", serial,
+                                                    "1.00", length))
+        for count in counts:
+            start = time.time()
+            moves = search.parallel_ida_star(height, width, values, count)
+            seconds = time.time() - start
+            assert len(moves) == length, "parallel search is not optimal"
+            print("%-6d %8d %10.3f %8.2f" % (index, count, seconds,
+                                              serial / max(seconds, 1e-9)))
+
+if __name__ == "__main__":
+    main()
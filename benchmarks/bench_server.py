@@ -0,0 +1,168 @@
+"""
+Load generator for server.py
+
+Opens several connections to a running solver service, keeps a number
+of requests in flight on each, and reports throughput and client-side
+latency percentiles next to the server's own metrics as JSON.  With
+--spawn it starts a private server on a temporary Unix socket first,
+so a benchmark needs nothing else running.
+
+    python benchmarks/bench_server.py --spawn --workers 2
+    python benchmarks/bench_server.py --unix /tmp/fifteen.sock -c 16 -n 20000
+"""
+
+import os, sys, json, time, random, socket, asyncio, argparse, tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import boards
+from server import DEFAULT_PORT, LINE_LIMIT, percentiles
+
+async def connect(args):
+    """
+    Open one connection to the server
+    Returns (reader, writer)
+    """
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix, limit=LINE_LIMIT)
+    return await asyncio.open_connection(args.host, args.port,
+                                         limit=LINE_LIMIT)
+
+async def read_reply(reader):
+    """
+    Read one reply line, failing rather than waiting on a reply that
+    will never come
+    Returns a dictionary
+    """
+    try:
+        line = await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        assert False, "reply longer than %d bytes" % LINE_LIMIT
+    assert line, "server closed the connection"
+    return json.loads(line.decode("utf-8"))
+
+async def run_connection(args, grids, latencies, errors):
+    """
+    Send grids over one connection with at most args.pipeline
+    requests unanswered, recording each request's latency; a failed
+    receiver stops the sender too, instead of leaving it blocked on the
+    pipeline window
+    """
+    reader, writer = await connect(args)
+    sent = {}
+    window = asyncio.Semaphore(args.pipeline)
+
+    async def receive():
+        for dummy_grid in grids:
+            response = await read_reply(reader)
+            latencies.append(time.time() - sent.pop(response["id"]))
+            if "error" in response:
+                errors.append(response["error"])
+            window.release()
+
+    async def send():
+        for request_id, grid in enumerate(grids):
+            await window.acquire()
+            sent[request_id] = time.time()
+            writer.write((json.dumps({"id": request_id, "grid": grid,
+                                      "mode": args.mode}) +
+                          "\n").encode("utf-8"))
+            await writer.drain()
+
+    tasks = [asyncio.ensure_future(receive()), asyncio.ensure_future(send())]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        writer.close()
+
+async def server_metrics(args):
+    """
+    Ask the server for its metrics
+    Returns a dictionary
+    """
+    reader, writer = await connect(args)
+    writer.write(b'{"op": "metrics"}\n')
+    await writer.drain()
+    metrics = await read_reply(reader)
+    writer.close()
+    return metrics
+
+async def run_load(args):
+    """
+    Drive every connection to completion
+    Returns a report dictionary
+    """
+    height, width = [int(dim) for dim in args.size.split("x")]
+    rng = random.Random(args.seed)
+    grids = [boards.random_grid(height, width, rng)
+             for dummy_idx in range(args.requests)]
+    latencies = []
+    errors = []
+    start = time.time()
+    await asyncio.gather(*[
+        run_connection(args, grids[idx::args.connections], latencies, errors)
+        for idx in range(args.connections)])
+    seconds = time.time() - start
+    return {"requests": len(latencies), "errors": len(errors),
+            "seconds": seconds,
+            "requests_per_second": len(latencies) / max(seconds, 1e-9),
+            "latency": percentiles(latencies),
+            "server": await server_metrics(args)}
+
+def spawn_server(args):
+    """
+    Start server.py on a temporary Unix socket and wait until it
+    accepts connections
+    Returns the server process
+    """
+    args.unix = os.path.join(tempfile.mkdtemp(), "fifteen.sock")
+    command = [sys.executable, os.path.join(ROOT, "server.py"),
+               "--unix", args.unix]
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+    process = subprocess.Popen(command)
+    for dummy_idx in range(200):
+        try:
+            probe = socket.socket(socket.AF_UNIX)
+            probe.connect(args.unix)
+            probe.close()
+            return process
+        except (OSError, IOError):
+            time.sleep(0.05)
+    process.kill()
+    sys.exit("server did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description="solver service load test")
+    parser.add_argument("--unix", help="Unix socket of a running server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--spawn", action="store_true",
+                        help="start a private server for the run")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes of a spawned server")
+    parser.add_argument("-c", "--connections", type=int, default=8)
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("--pipeline", type=int, default=16,
+                        help="unanswered requests per connection")
+    parser.add_argument("--size", default="4x4", help="board size HxW")
+    parser.add_argument("--mode", default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    process = spawn_server(args) if args.spawn else None
+    try:
+        report = asyncio.run(run_load(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark for cold start of a solver worker
+
+Each run starts a fresh interpreter, as a new worker process would,
+and measures the import time of the solver, the latency of its first
+solve and the total process lifetime.  It also checks that importing
+the solver never pulls in pygame.
+
+    python benchmarks/bench_startup.py [--runs 10] [--mode greedy]
+"""
+
+import os, sys, json, time, argparse, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import sys, time, json
+start = time.time()
+from fifteen import Puzzle
+imported = time.time()
+puzzle = Puzzle(4, 4, [[4, 1, 2, 3], [8, 5, 6, 7], [12, 9, 10, 11],
+                       [0, 13, 14, 15]])
+puzzle.solve_puzzle(sys.argv[1])
+solved = time.time()
+print(json.dumps({"import": imported - start, "solve": solved - imported,
+                  "pygame": "pygame" in sys.modules}))
+"""
+
+def median(values):
+    """
+    Returns the median of a non-empty list
+    """
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+def run_worker(mode):
+    """
+    Time one fresh interpreter importing the solver and solving once
+    Returns a dictionary of timings in seconds
+    """
+    start = time.time()
+    output = subprocess.check_output([sys.executable, "-c", WORKER, mode],
+                                     cwd=ROOT)
+    result = json.loads(output.decode())
+    result["process"] = time.time() - start
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="worker cold start")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--mode", default="greedy",
+                        help="solve_puzzle mode for the first solve")
+    args = parser.parse_args()
+
+    results = [run_worker(args.mode) for dummy_idx in range(args.runs)]
+    for key in ("import", "solve", "process"):
+        values = [result[key] for result in results]
+        print("%-8s median %8.2f ms   max %8.2f ms" % (
+            key, 1e3 * median(values), 1e3 * max(values)))
+    if any(result["pygame"] for result in results):
+        sys.exit("importing the solver loaded pygame")
+
+if __name__ == "__main__":
+    main()
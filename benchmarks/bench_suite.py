@@ -0,0 +1,145 @@
+"""
+Benchmark suite for solve_puzzle
+
+Solves fixed-seed corpora for each board size and scramble depth and
+reports wall time, moves per second, peak memory and solution length
+as JSON.  A depth is either a random walk length or "uniform" for
+uniformly random solvable boards.
+
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json --threshold 0.1
+
+Compare mode exits with status 1 when any corpus regresses by more
+than the threshold (a fraction) against the stored baseline.
+"""
+
+import os, sys, gc, json, time, random, argparse, platform, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boards
+from fifteen import Puzzle
+
+SIZES = "3x3,4x4,5x5,10x10,20x20,50x50,100x100"
+DEPTHS = "10,1000,uniform"
+
+#metric -> +1 if larger is worse, -1 if smaller is worse
+METRICS = {"seconds": 1, "moves_per_second": -1, "peak_kib": 1,
+           "mean_length": 1}
+
+def corpus(height, width, depth, count, seed):
+    """
+    Fixed-seed boards for one size and depth
+    Returns a list of grids
+    """
+    rng = random.Random("%dx%d/%s/%d" % (height, width, depth, seed))
+    if depth == "uniform":
+        return [boards.random_grid(height, width, rng)
+                for dummy in range(count)]
+    return [boards.scrambled_grid(height, width, int(depth), rng)
+            for dummy in range(count)]
+
+def run_corpus(grids, mode, repeat):
+    """
+    Solve every grid repeat times for the best wall time, then once
+    more under tracemalloc for peak memory
+    Returns a dictionary of metrics
+    """
+    seconds = None
+    for dummy_idx in range(repeat):
+        puzzles = [Puzzle(len(grid), len(grid[0]), grid) for grid in grids]
+        gc.collect()
+        start = time.time()
+        lengths = [len(puzzle.solve_puzzle(mode)) for puzzle in puzzles]
+        elapsed = time.time() - start
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+
+    peak = 0
+    for grid in grids:
+        puzzle = Puzzle(len(grid), len(grid[0]), grid)
+        tracemalloc.start()
+        puzzle.solve_puzzle(mode)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"boards": len(grids),
+            "seconds": seconds,
+            "moves_per_second": sum(lengths) / max(seconds, 1e-9),
+            "peak_kib": peak / 1024.0,
+            "mean_length": float(sum(lengths)) / len(lengths)}
+
+def run_suite(sizes, depths, mode, seed, max_boards, repeat):
+    """
+    Run every size and depth combination
+    Returns a report dictionary
+    """
+    results = {}
+    for size in sizes:
+        height, width = [int(dim) for dim in size.split("x")]
+        count = max(1, min(max_boards, 4000 // (height * width)))
+        for depth in depths:
+            name = "%s/%s" % (size, depth)
+            grids = corpus(height, width, depth, count, seed)
+            results[name] = run_corpus(grids, mode, repeat)
+            sys.stderr.write("%-20s %8.3fs %12.0f moves/s\n" % (
+                name, results[name]["seconds"],
+                results[name]["moves_per_second"]))
+    return {"meta": {"python": platform.python_version(),
+                     "platform": platform.platform(),
+                     "mode": mode, "seed": seed, "repeat": repeat},
+            "results": results}
+
+def compare(report, baseline, threshold):
+    """
+    Relative changes beyond threshold in the bad direction
+    Returns a list of regression dictionaries
+    """
+    regressions = []
+    for name, result in sorted(report["results"].items()):
+        if name not in baseline["results"]:
+            continue
+        for metric, sign in sorted(METRICS.items()):
+            old = baseline["results"][name][metric]
+            if not old:
+                continue
+            change = (result[metric] - old) / float(old)
+            if sign * change > threshold:
+                regressions.append({"corpus": name, "metric": metric,
+                                    "baseline": old, "current": result[metric],
+                                    "change": change})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="solve_puzzle benchmarks")
+    parser.add_argument("--sizes", default=SIZES,
+                        help="comma separated HxW sizes")
+    parser.add_argument("--depths", default=DEPTHS,
+                        help="comma separated walk lengths or 'uniform'")
+    parser.add_argument("--mode", default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--boards", type=int, default=50,
+                        help="most boards per corpus")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per corpus, the best one counts")
+    parser.add_argument("--save", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed relative regression")
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes.split(","), args.depths.split(","),
+                       args.mode, args.seed, args.boards, args.repeat)
+    if args.compare:
+        with open(args.compare) as source:
+            baseline = json.load(source)
+        report["regressions"] = compare(report, baseline, args.threshold)
+    if args.save:
+        with open(args.save, "w") as out:
+            json.dump(report, out, indent=2, sort_keys=True)
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+    if report.get("regressions"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
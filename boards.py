@@ -0,0 +1,143 @@
+"""
+Solvability checks and random board generation
+
+A board is solvable exactly when the parity of its permutation (read
+row-major, blank included) matches the parity of the blank's distance
+from the top left corner, where the blank sits in the solved layout.
+Parity comes from an O(n log n) inversion count over a Fenwick tree.
+The rule needs a 2x2 cycle to exist, so on a board one row or column
+wide, where the blank only slides along a line, a board is solvable
+exactly when its tiles are already in order around the blank.
+
+Write seeded, uniformly random solvable boards as JSON lines, ready
+for batch.py:
+
+    python boards.py --size 4x4 --count 100000 --seed 1 > boards.jsonl
+"""
+
+import sys, json, random, argparse
+
+def count_inversions(values):
+    """
+    Number of pairs i < j with values[i] > values[j], for a
+    permutation of 0..len(values) - 1
+    Returns an integer
+    """
+    size = len(values)
+    tree = [0] * (size + 1)
+    inversions = 0
+    for seen, value in enumerate(values):
+        #smaller-or-equal values seen so far, stored one-based
+        index = value + 1
+        not_greater = 0
+        while index > 0:
+            not_greater += tree[index]
+            index -= index & -index
+        inversions += seen - not_greater
+        index = value + 1
+        while index <= size:
+            tree[index] += 1
+            index += index & -index
+    return inversions
+
+def is_permutation(values):
+    """
+    Whether values holds each of 0..len(values) - 1 exactly once
+    Returns a boolean
+    """
+    seen = bytearray(len(values))
+    for value in values:
+        if not 0 <= value < len(values) or seen[value]:
+            return False
+        seen[value] = 1
+    return True
+
+def is_solvable(height, width, values):
+    """
+    Whether the row-major board values can reach the solved layout
+    Returns a boolean
+    """
+    if len(values) != height * width or not is_permutation(values):
+        return False
+    if height == 1 or width == 1:
+        tiles = [value for value in values if value]
+        return tiles == sorted(tiles)
+    row, col = divmod(values.index(0), width)
+    return count_inversions(values) % 2 == (row + col) % 2
+
+def random_values(height, width, rng=random):
+    """
+    Uniformly random solvable board as a row-major list
+    Swapping the first two tiles maps unsolvable boards one to one
+    onto solvable ones, so fixing up a uniform shuffle stays uniform;
+    a one row or column board is solved up to where its blank is
+    Returns a list of integers
+    """
+    if height == 1 or width == 1:
+        values = list(range(1, height * width))
+        values.insert(rng.randrange(height * width), 0)
+        return values
+    values = list(range(height * width))
+    rng.shuffle(values)
+    if not is_solvable(height, width, values):
+        first, second = [cell for cell, value in enumerate(values)
+                         if value][:2]
+        values[first], values[second] = values[second], values[first]
+    return values
+
+def random_grid(height, width, rng=random):
+    """
+    Uniformly random solvable board
+    Returns a list of lists
+    """
+    values = random_values(height, width, rng)
+    return [values[row * width:(row + 1) * width] for row in range(height)]
+
+def scrambled_grid(height, width, walk, rng=random):
+    """
+    Scramble the solved board with a random walk of the blank, moves
+    that would leave the board are skipped
+    Returns a list of lists
+    """
+    values = list(range(height * width))
+    blank = 0
+    for dummy_idx in range(walk):
+        row, col = divmod(blank, width)
+        direction = rng.randrange(4)
+        if direction == 0 and row > 0:
+            cell = blank - width
+        elif direction == 1 and row < height - 1:
+            cell = blank + width
+        elif direction == 2 and col > 0:
+            cell = blank - 1
+        elif direction == 3 and col < width - 1:
+            cell = blank + 1
+        else:
+            continue
+        values[blank] = values[cell]
+        values[cell] = 0
+        blank = cell
+    return [values[row * width:(row + 1) * width] for row in range(height)]
+
+def random_grids(height, width, count, seed=None):
+    """
+    Reproducible stream of uniformly random solvable boards
+    Yields lists of lists
+    """
+    rng = random.Random(seed)
+    for dummy_idx in range(count):
+        yield random_grid(height, width, rng)
+
+def main():
+    parser = argparse.ArgumentParser(description="random solvable boards")
+    parser.add_argument("--size", default="4x4", help="board size HxW")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    height, width = [int(dim) for dim in args.size.split("x")]
+    for grid in random_grids(height, width, args.count, args.seed):
+        sys.stdout.write(json.dumps(grid) + "\n")
+
+if __name__ == "__main__":
+    main()
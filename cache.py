@@ -0,0 +1,185 @@
+"""
+Solution cache in front of Puzzle.solve_puzzle
+
+Solutions are keyed by the solver mode and a canonical packed encoding
+of the board, so the same starting configuration is only ever solved
+once.  An in-memory LRU tier sits in front of an optional sqlite file
+shared between runs and processes; both tiers evict least recently
+used entries once their stored size passes a bound.
+
+    cache = SolutionCache(path="solutions.sqlite")
+    moves = cache.solve(puzzle)
+    print(cache.stats())
+"""
+
+import sqlite3, struct, collections
+
+from packed import PackedState
+
+def board_key(puzzle, mode="greedy"):
+    """
+    Canonical bytes for a board and solver mode
+    Returns bytes
+    """
+    state = PackedState.from_puzzle(puzzle)
+    tiles = state.key()
+    if not isinstance(tiles, bytes):
+        tiles = struct.pack("<Q", tiles)
+    header = struct.pack("<HH", puzzle.get_height(), puzzle.get_width())
+    return header + mode.encode("ascii") + b":" + tiles
+
+class SolutionCache(object):
+    """
+    Two-tier LRU cache of solutions
+    """
+
+    def __init__(self, max_bytes=64 << 20, path=None, disk_max_bytes=1 << 30):
+        """
+        max_bytes bounds the memory tier; path, if given, names an
+        sqlite file for the disk tier bounded by disk_max_bytes
+        """
+        self._entries = collections.OrderedDict()
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                        "memory_evictions": 0, "disk_evictions": 0}
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS solutions ("
+                             "key BLOB PRIMARY KEY, moves TEXT NOT NULL, "
+                             "size INTEGER NOT NULL, used INTEGER NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS solutions_used "
+                             "ON solutions (used)")
+            #running total of solutions.size, kept in step by _store
+            self._db.execute("CREATE TABLE IF NOT EXISTS total "
+                             "(size INTEGER NOT NULL)")
+            count = self._db.execute("SELECT COUNT(*) FROM total").fetchone()
+            if not count[0]:
+                self._db.execute("INSERT INTO total SELECT "
+                                 "COALESCE(SUM(size), 0) FROM solutions")
+            self._db.commit()
+        self._disk_max_bytes = disk_max_bytes
+
+    def close(self):
+        """
+        Close the disk tier
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key, moves):
+        """
+        Put an entry in the memory tier, evicting as needed
+        """
+        if key in self._entries:
+            self._bytes -= len(key) + len(self._entries.pop(key))
+        self._entries[key] = moves
+        self._bytes += len(key) + len(moves)
+        while self._bytes > self._max_bytes and len(self._entries) > 1:
+            old_key, old_moves = self._entries.popitem(last=False)
+            self._bytes -= len(old_key) + len(old_moves)
+            self._counts["memory_evictions"] += 1
+
+    def _next_use(self):
+        """
+        Monotonic use counter for the disk tier's LRU order
+        Returns an integer
+        """
+        row = self._db.execute("SELECT MAX(used) FROM solutions").fetchone()
+        return (row[0] or 0) + 1
+
+    def _store(self, key, moves):
+        """
+        Put an entry in the disk tier, evicting as needed
+        """
+        size = len(key) + len(moves)
+        with self._db:
+            #take the write lock before reading the old size, the use
+            #counter and the total, so concurrent writers cannot
+            #interleave between these reads and the writes below
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute("SELECT size FROM solutions WHERE key = ?",
+                                   (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO solutions "
+                             "VALUES (?, ?, ?, ?)",
+                             (key, moves, size, self._next_use()))
+            total = self._db.execute("SELECT size FROM total").fetchone()[0]
+            total += size - (row[0] if row else 0)
+            while total > self._disk_max_bytes:
+                row = self._db.execute("SELECT key, size FROM solutions "
+                                       "ORDER BY used LIMIT 1").fetchone()
+                if row is None or row[0] == key:
+                    break
+                self._db.execute("DELETE FROM solutions WHERE key = ?",
+                                 (row[0],))
+                total -= row[1]
+                self._counts["disk_evictions"] += 1
+            self._db.execute("UPDATE total SET size = ?", (total,))
+
+    def get(self, puzzle, mode="greedy"):
+        """
+        Cached solution for the puzzle's current board
+        Returns a move string, or None on a miss
+        """
+        key = board_key(puzzle, mode)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._counts["memory_hits"] += 1
+            return self._entries[key]
+        if self._db is not None:
+            row = self._db.execute("SELECT moves FROM solutions WHERE key = ?",
+                                   (key,)).fetchone()
+            if row is not None:
+                with self._db:
+                    self._db.execute("BEGIN IMMEDIATE")
+                    self._db.execute("UPDATE solutions SET used = ? "
+                                     "WHERE key = ?", (self._next_use(), key))
+                self._remember(key, row[0])
+                self._counts["disk_hits"] += 1
+                return row[0]
+        self._counts["misses"] += 1
+        return None
+
+    def put(self, puzzle, moves, mode="greedy"):
+        """
+        Cache moves as the solution for the puzzle's current board
+        """
+        key = board_key(puzzle, mode)
+        self._remember(key, moves)
+        if self._db is not None:
+            self._store(key, moves)
+
+    def solve(self, puzzle, mode="greedy"):
+        """
+        Cached drop-in for puzzle.solve_puzzle(mode)
+        Updates the puzzle and returns a move string
+        """
+        moves = self.get(puzzle, mode)
+        if moves is None:
+            key_puzzle = puzzle.clone()
+            moves = puzzle.solve_puzzle(mode)
+            self.put(key_puzzle, moves, mode)
+        else:
+            puzzle.update_puzzle(moves)
+        return moves
+
+    def stats(self):
+        """
+        Hit, miss and eviction counts with the size of each tier
+        Returns a dictionary
+        """
+        stats = dict(self._counts)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (float(lookups - stats["misses"]) / lookups
+                             if lookups else 0.0)
+        stats["memory_entries"] = len(self._entries)
+        stats["memory_bytes"] = self._bytes
+        if self._db is not None:
+            stats["disk_entries"] = self._db.execute(
+                "SELECT COUNT(*) FROM solutions").fetchone()[0]
+            stats["disk_bytes"] = self._db.execute(
+                "SELECT size FROM total").fetchone()[0]
+        return stats
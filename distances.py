@@ -0,0 +1,220 @@
+"""
+Complete distance tables for small boards
+
+A breadth-first search back from the goal visits every solvable board
+once and stores its distance, so optimal lengths are a table lookup and
+optimal solutions a walk down the distance gradient, with no search.
+
+Boards are indexed by the blank's cell and the halved permutation rank
+of the other tiles: with the blank fixed, the order of the last two
+tiles of a solvable board follows from parity, so the index is unique
+and the table needs one byte per solvable board (181,440 for 3x3).
+
+Build once, then every process memory-maps the same file:
+
+    python distances.py [--size 3x3] [--output FILE]
+"""
+
+import os, mmap, struct, argparse, time
+
+from moves import neighbors
+
+MAGIC = b"FDST"
+VERSION = 1
+HEADER = struct.Struct("<4sHHH")
+UNKNOWN = 255
+
+def default_path(height, width):
+    """
+    Location of the distance table file for a board size
+    Returns a string
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data",
+                        "fifteen-%dx%d.dist" % (height, width))
+
+def _rank_tables(num_cells):
+    """
+    Factorial weights per position and a popcount table over bitmasks
+    of the values seen so far
+    Returns (weights, counts)
+    """
+    weights = []
+    factorial = 1
+    for position in range(num_cells):
+        weights.append(factorial)
+        factorial *= position + 1
+    weights.reverse()
+    counts = bytearray(1 << num_cells)
+    for mask in range(1, len(counts)):
+        counts[mask] = counts[mask >> 1] + (mask & 1)
+    return weights, counts
+
+class _Ranker(object):
+    """
+    Table index of a row-major board
+    """
+
+    def __init__(self, num_cells):
+        """
+        Precompute the rank tables for boards of num_cells cells
+        """
+        self._weights, self._counts = _rank_tables(num_cells - 1)
+        self.stride = self._weights[0] * (num_cells - 1) // 2
+
+    def rank(self, values):
+        """
+        Blank cell times the number of tile orders with equal parity,
+        plus the halved Lehmer code rank of the tiles in board order
+        Returns an integer
+        """
+        counts = self._counts
+        weights = iter(self._weights)
+        seen = rank = 0
+        for value in values:
+            if value:
+                #tiles before this one that are smaller than it
+                rank += (value - 1 - counts[seen & ((1 << value) - 1)]
+                         ) * next(weights)
+                seen |= 1 << value
+        return values.index(0) * self.stride + (rank >> 1)
+
+def build_table(height, width):
+    """
+    Breadth-first search from the goal over every solvable board
+    Returns a bytearray of distances indexed by halved rank
+    """
+    num_cells = height * width
+    assert num_cells <= 12, "board too large for a full distance table"
+    ranker = _Ranker(num_cells)
+    moves = neighbors(height, width)
+    size = 1
+    for factor in range(3, num_cells + 1):
+        size *= factor
+    table = bytearray([UNKNOWN]) * size
+    table[ranker.rank(range(num_cells))] = 0
+    frontier = [(bytearray(range(num_cells)), 0)]
+    depth = 0
+    while frontier:
+        depth += 1
+        assert depth < UNKNOWN, "distances too large for the table"
+        following = []
+        for values, blank in frontier:
+            for dummy_direction, cell in moves[blank]:
+                board = bytearray(values)
+                board[blank] = board[cell]
+                board[cell] = 0
+                index = ranker.rank(board)
+                if table[index] == UNKNOWN:
+                    table[index] = depth
+                    following.append((board, cell))
+        frontier = following
+    return table
+
+def write_table(path, height, width, table):
+    """
+    Write table to path after a small header
+    """
+    with open(path + ".tmp", "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, height, width))
+        out.write(table)
+    os.rename(path + ".tmp", path)
+
+class DistanceTable(object):
+    """
+    Read-only, memory-mapped view of a distance table file
+    """
+
+    def __init__(self, path):
+        """
+        Map the table file at path
+        """
+        with open(path, "rb") as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, height, width = HEADER.unpack_from(self._map, 0)
+        assert magic == MAGIC and version == VERSION, "bad table: " + path
+        self.height = height
+        self.width = width
+        self._table = memoryview(self._map)[HEADER.size:]
+        self._ranker = _Ranker(height * width)
+        self._moves = neighbors(height, width)
+
+    def distance(self, values):
+        """
+        Optimal solution length for a solvable row-major board; an
+        unsolvable board shares its index with a solvable one, so check
+        boards.is_solvable first when the input is untrusted
+        Returns an integer
+        """
+        distance = self._table[self._ranker.rank(values)]
+        assert distance != UNKNOWN, "table is incomplete"
+        return distance
+
+    def solution(self, values):
+        """
+        Optimal move string for a solvable row-major board, found by
+        stepping to a neighbor one move closer at every turn
+        Returns a string
+        """
+        table = self._table
+        rank = self._ranker.rank
+        stride = self._ranker.stride
+        board = list(values)
+        blank = board.index(0)
+        index = rank(board)
+        distance = table[index]
+        path = []
+        while distance:
+            for direction, cell in self._moves[blank]:
+                board[blank] = board[cell]
+                board[cell] = 0
+                if direction in "lr":
+                    #the tiles keep their order, only the blank moves
+                    moved = index + (cell - blank) * stride
+                else:
+                    moved = rank(board)
+                if table[moved] == distance - 1:
+                    path.append(direction)
+                    blank = cell
+                    index = moved
+                    distance -= 1
+                    break
+                board[cell] = board[blank]
+                board[blank] = 0
+            else:
+                assert False, "board is not solvable"
+        return "".join(path)
+
+_LOADED = {}
+
+def load(height, width, path=None):
+    """
+    Distance table for a board size, mapping the file only once per
+    process
+    Returns a DistanceTable, or None if no table has been built
+    """
+    path = path or default_path(height, width)
+    if path not in _LOADED:
+        if not os.path.exists(path):
+            return None
+        table = DistanceTable(path)
+        assert (table.height, table.width) == (
+            height, width), "table is for another board size: " + path
+        _LOADED[path] = table
+    return _LOADED[path]
+
+def main():
+    parser = argparse.ArgumentParser(description="build a distance table")
+    parser.add_argument("--size", default="3x3", help="board size HxW")
+    parser.add_argument("--output", help="table file to write")
+    args = parser.parse_args()
+
+    height, width = [int(dim) for dim in args.size.split("x")]
+    start = time.time()
+    table = build_table(height, width)
+    print("%d boards, deepest %d moves, %.1fs" % (
+        len(table), max(table), time.time() - start))
+    write_table(args.output or default_path(height, width), height, width,
+                table)
+
+if __name__ == "__main__":
+    main()
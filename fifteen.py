@@ -2,11 +2,37 @@
 Loyd's Fifteen puzzle - solver and visualizer
 
 Use the arrows key to swap blank tile with its neighbors
+
+Importing this module only loads the solver; the GUI starts when the
+module is run as a script.
 """
 
-import fifteengui
+import operator
+
+import boards
+import planner
+from moves import MoveRuns, compile_pattern
 
-class Puzzle:
+#(height, width) -> (solved tiles dictionary, cell list), shared by
+#every puzzle of that size
+_GOAL_TABLES = {}
+
+def _goal_tables(height, width):
+    """
+    Goal tables for a board size, built once per process
+    Returns (solved_tiles, indices)
+    """
+    if (height, width) not in _GOAL_TABLES:
+        solved_tiles = {}
+        indices = []
+        for row in range(height):
+            for col in range(width):
+                solved_tiles[(row, col)] = len(indices)
+                indices.append((row, col))
+        _GOAL_TABLES[(height, width)] = (solved_tiles, tuple(indices))
+    return _GOAL_TABLES[(height, width)]
+
+class Puzzle(object):
     """
     Class representation for the Fifteen puzzle
     """
@@ -26,9 +52,12 @@ class Puzzle:
             for row in range(puzzle_height):
                 for col in range(puzzle_width):
                     self._grid[row][col] = initial_grid[row][col]
-        self._solved_tiles = {}
-        self._indices = []
-        self._solved_tile_init()
+        self._positions = [None] * (puzzle_height * puzzle_width)
+        self._positions_init()
+        self._solved_tiles, self._indices = _goal_tables(puzzle_height,
+                                                         puzzle_width)
+        self._tracking_init()
+        self._profiler = None
         
     def __str__(self):
         """
@@ -41,18 +70,70 @@ class Puzzle:
             ans += "\n"
         return ans
     
-    def _solved_tile_init(self):
+    def _positions_init(self):
         """
-        solved tiles dictionary
+        inverse index mapping each tile value to its (row, col)
         """
-        count = 0
         for row in range(self._height):
             for col in range(self._width):
-                self._solved_tiles[(row,col)] = count
-                self._indices.append((row,col))
-                count += 1
+                self._positions[self._grid[row][col]] = (row, col)
+
+    def _tracking_init(self):
+        """
+        count misplaced tiles and find where the solved suffix of the
+        row-major cell order starts
+        """
+        self._misplaced = 0
+        self._boundary = 0
+        for row in range(self._height):
+            for col in range(self._width):
+                cell = row * self._width + col
+                if self._grid[row][col] != cell:
+                    self._misplaced += 1
+                    self._boundary = cell + 1
+
+    def _region_state(self, min_row, max_row, min_col, max_col):
+        """
+        misplaced tiles and the last misplaced cell (-1 if none)
+        within a rectangle of the grid
+        """
+        misplaced = 0
+        last = -1
+        for row in range(min_row, max_row + 1):
+            first = row * self._width + min_col
+            flags = list(map(operator.ne,
+                             self._grid[row][min_col:max_col + 1],
+                             range(first, first + max_col + 1 - min_col)))
+            count = sum(flags)
+            if count:
+                misplaced += count
+                last = first + len(flags) - 1 - flags[::-1].index(True)
+        return misplaced, last
+
+    def _solved_suffix_start(self):
+        """
+        First row-major cell from which every tile is solved; cells
+        are only ever marked unsolved eagerly, so this lowers the
+        boundary lazily past cells solved since the last call
+        Returns an integer
+        """
+        boundary = self._boundary
+        width = self._width
+        while boundary > 0:
+            row, col = divmod(boundary - 1, width)
+            if self._grid[row][col] != boundary - 1:
+                break
+            boundary -= 1
+        self._boundary = boundary
+        return boundary
+
+    def get_misplaced(self):
+        """
+        Number of tiles, blank included, not in their solved position
+        Returns an integer
+        """
+        return self._misplaced
 
-                
     #####################################
     # GUI methods
 
@@ -81,14 +162,56 @@ class Puzzle:
         """
         Setter for the number at tile position pos
         """
+        cell = row * self._width + col
+        self._misplaced += (value != cell) - (self._grid[row][col] != cell)
+        if value != cell and cell >= self._boundary:
+            self._boundary = cell + 1
         self._grid[row][col] = value
+        self._positions[value] = (row, col)
+
+    def is_solvable(self):
+        """
+        Check whether the puzzle can reach the solved state, in
+        O(n log n) for n tiles
+        Returns a boolean
+        """
+        return boards.is_solvable(self._height, self._width,
+                                  [value for row in self._grid
+                                   for value in row])
+
+    def set_profiler(self, profiler):
+        """
+        Attach a profiling.SolveProfiler, or None to detach it
+        While attached, update_puzzle, run applications and
+        current_position are shadowed by counting wrappers on this
+        instance; detached puzzles run the plain methods untouched
+        """
+        for name in ("update_puzzle", "_move", "current_position"):
+            self.__dict__.pop(name, None)
+        self._profiler = profiler
+        if profiler is not None:
+            self.update_puzzle = profiler.counting("updates", self.update_puzzle)
+            self._move = profiler.counting("updates", self._move)
+            self.current_position = profiler.counting("lookups",
+                                                      self.current_position)
 
     def clone(self):
         """
-        Make a copy of the puzzle to update during solving
+        Make a copy of the puzzle to update during solving; copies
+        the rows and the position index, shares the goal tables and
+        leaves any profiler behind
         Returns a Puzzle object
         """
-        new_puzzle = Puzzle(self._height, self._width, self._grid)
+        new_puzzle = self.__class__.__new__(self.__class__)
+        new_puzzle._height = self._height
+        new_puzzle._width = self._width
+        new_puzzle._grid = [row[:] for row in self._grid]
+        new_puzzle._positions = self._positions[:]
+        new_puzzle._solved_tiles = self._solved_tiles
+        new_puzzle._indices = self._indices
+        new_puzzle._misplaced = self._misplaced
+        new_puzzle._boundary = self._boundary
+        new_puzzle._profiler = None
         return new_puzzle
 
     ########################################################
@@ -101,45 +224,134 @@ class Puzzle:
         Returns a tuple of two integers        
         """
         solved_value = (solved_col + self._width * solved_row)
-
-        for row in range(self._height):
-            for col in range(self._width):
-                if self._grid[row][col] == solved_value:
-                    return (row, col)
-        assert False, "Value " + str(solved_value) + " not found"
+        position = self._positions[solved_value]
+        assert position != None, "Value " + str(solved_value) + " not found"
+        return position
 
     def update_puzzle(self, move_string):
         """
         Updates the puzzle state based on the provided move string
+        or MoveRuns, the latter applied a whole run at a time
         """
+        if isinstance(move_string, MoveRuns):
+            for pattern, count in move_string.runs():
+                self._apply_run(pattern, count)
+            return
         zero_row, zero_col = self.current_position(0, 0)
         for direction in move_string:
             if direction == "l":
                 assert zero_col > 0, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = (self._grid[zero_row][zero_col
-                                                                          - 1])
-                self._grid[zero_row][zero_col - 1] = 0
-                zero_col -= 1
+                tile_row, tile_col = zero_row, zero_col - 1
             elif direction == "r":
                 assert zero_col < self._width - 1, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = (self._grid[zero_row][zero_col
-                                                                          + 1])
-                self._grid[zero_row][zero_col + 1] = 0
-                zero_col += 1
+                tile_row, tile_col = zero_row, zero_col + 1
             elif direction == "u":
                 assert zero_row > 0, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = (self._grid[zero_row
-                                                             - 1][zero_col])
-                self._grid[zero_row - 1][zero_col] = 0
-                zero_row -= 1
+                tile_row, tile_col = zero_row - 1, zero_col
             elif direction == "d":
                 assert zero_row < self._height - 1, "move off grid: " + direction
-                self._grid[zero_row][zero_col] = (self._grid[zero_row
-                                                            + 1][zero_col])
-                self._grid[zero_row + 1][zero_col] = 0
-                zero_row += 1
+                tile_row, tile_col = zero_row + 1, zero_col
             else:
                 assert False, "invalid direction: " + direction
+            #swap zero with neighbor and keep the inverse index in step
+            tile = self._grid[tile_row][tile_col]
+            self._grid[zero_row][zero_col] = tile
+            self._grid[tile_row][tile_col] = 0
+            self._positions[tile] = (zero_row, zero_col)
+            self._positions[0] = (tile_row, tile_col)
+            #track misplaced tiles and the solved suffix boundary
+            zero_cell = zero_row * self._width + zero_col
+            tile_cell = tile_row * self._width + tile_col
+            self._misplaced += ((tile != zero_cell) + (tile_cell != 0) -
+                                (zero_cell != 0) - (tile != tile_cell))
+            if tile != zero_cell and zero_cell >= self._boundary:
+                self._boundary = zero_cell + 1
+            if tile_cell != 0 and tile_cell >= self._boundary:
+                self._boundary = tile_cell + 1
+            zero_row, zero_col = tile_row, tile_col
+
+    def _apply_run(self, pattern, count):
+        """
+        Apply count repetitions of pattern, checking the bounds of the
+        whole run once instead of move by move
+        """
+        if count <= 0:
+            return
+        (steps, net_row, net_col,
+         min_row, max_row, min_col, max_col) = compile_pattern(pattern)
+        zero_row, zero_col = self._positions[0]
+        span_row = (count - 1) * net_row
+        span_col = (count - 1) * net_col
+        assert (zero_row + min_row + min(span_row, 0) >= 0 and
+                zero_row + max_row + max(span_row, 0) < self._height and
+                zero_col + min_col + min(span_col, 0) >= 0 and
+                zero_col + max_col + max(span_col, 0) < self._width), (
+                    "move off grid: " + pattern)
+        grid = self._grid
+        positions = self._positions
+        if pattern == "l" or pattern == "r":
+            #shift a row segment in one slice assignment
+            region = (zero_row, zero_row, zero_col + min(span_col, 0) + min_col,
+                      zero_col + max(span_col, 0) + max_col)
+            misplaced_before = self._region_state(*region)[0]
+            row = grid[zero_row]
+            if pattern == "l":
+                first = zero_col - count
+                tiles = row[first:zero_col]
+                row[first + 1:zero_col + 1] = tiles
+                first += 1
+            else:
+                first = zero_col
+                tiles = row[zero_col + 1:zero_col + count + 1]
+                row[zero_col:zero_col + count] = tiles
+            for offset, tile in enumerate(tiles):
+                positions[tile] = (zero_row, first + offset)
+            zero_col += net_col * count
+            row[zero_col] = 0
+            misplaced_after, last = self._region_state(*region)
+            self._misplaced += misplaced_after - misplaced_before
+            if last >= self._boundary:
+                self._boundary = last + 1
+        else:
+            width = self._width
+            misplaced = self._misplaced
+            boundary = self._boundary
+            start_cell = zero_row * width + zero_col
+            zero_cell = start_cell
+            steps = [(d_row, d_col, d_row * width + d_col)
+                     for d_row, d_col in steps]
+            for dummy_idx in range(count):
+                for d_row, d_col, d_cell in steps:
+                    tile_row, tile_col = zero_row + d_row, zero_col + d_col
+                    tile = grid[tile_row][tile_col]
+                    grid[zero_row][zero_col] = tile
+                    positions[tile] = (zero_row, zero_col)
+                    #the tile's half of update_puzzle's bookkeeping, the
+                    #blank's half telescopes to its start and end cells
+                    tile_cell = zero_cell + d_cell
+                    if tile != zero_cell:
+                        if zero_cell >= boundary:
+                            boundary = zero_cell + 1
+                        if tile == tile_cell:
+                            misplaced += 1
+                    elif tile != tile_cell:
+                        misplaced -= 1
+                    zero_row, zero_col, zero_cell = tile_row, tile_col, tile_cell
+            grid[zero_row][zero_col] = 0
+            misplaced += (zero_cell != 0) - (start_cell != 0)
+            if zero_cell != 0 and zero_cell >= boundary:
+                boundary = zero_cell + 1
+            self._misplaced = misplaced
+            self._boundary = boundary
+        positions[0] = (zero_row, zero_col)
+
+    def _move(self, runs, pattern, count=1):
+        """
+        Apply count repetitions of pattern and record them in runs
+        """
+        if count > 0:
+            self._apply_run(pattern, count)
+            runs.append(pattern, count)
 
     ##################################################################
     # Phase one methods0
@@ -152,113 +364,120 @@ class Puzzle:
         """
        
         tile = self.get_number(target_row,target_col)
-        tile_idx = self._indices.index((target_row, target_col))
+        tile_idx = target_row * self._width + target_col
         if tile == 0:
-            for cord in self._indices[tile_idx+1:]:
-                if self._solved_tiles[(cord[0], cord[1])] != self.get_number(
-                                                            cord[0],cord[1]):
-                    return False
-            return True
+            return self._solved_suffix_start() <= tile_idx + 1
         return False
 
-    def position_tile(self, target_row, target_col, called_from_col0 = False):
+    def position_tile(self, target_row, target_col, called_from_col0 = False,
+                      runs=None):
         """
         place zero to the left of target tile, if target tile is in row 0
         moves target tile down a row
+        Appends to runs if given and returns it, else returns a move string
         """
+        moves = MoveRuns() if runs is None else runs
         current_row, current_col = self.current_position(target_row, target_col)
         if called_from_col0:
-            move_str = "u" * ((target_row -1) - current_row)
+            self._move(moves, "u", (target_row -1) - current_row)
         else:
-            move_str = "u" * (target_row - current_row)
-        self.update_puzzle(move_str)
+            self._move(moves, "u", target_row - current_row)
         current_row, current_col = self.current_position(target_row, target_col)
         if current_col == target_col and not called_from_col0:
-            move_str += "ld"
-            self.update_puzzle("ld")
-            return move_str
-        if called_from_col0:
-            if current_col == 1:
-                move_str += "ld"
-                self.update_puzzle("ld")
-                return move_str
-        if current_col <= target_col:
-            if called_from_col0:
-                move = ("l")               
-            else:
-                move = "l" * (target_col - current_col)
-            move_str += move
-            self.update_puzzle(move)
+            self._move(moves, "ld")
+        elif called_from_col0 and current_col == 1:
+            self._move(moves, "ld")
         else:
-            if called_from_col0:
-                move = "r" * ((current_col-2) - target_col)
+            if current_col <= target_col:
+                if called_from_col0:
+                    self._move(moves, "l")
+                else:
+                    self._move(moves, "l", target_col - current_col)
             else:
-                move = "r" * ((current_col-1) - target_col)
-            move_str += move
-            self.update_puzzle(move)
-        if current_row == 0:
-            move_str += "druld"
-            self.update_puzzle("druld")
-        return move_str
+                if called_from_col0:
+                    self._move(moves, "r", (current_col-2) - target_col)
+                else:
+                    self._move(moves, "r", (current_col-1) - target_col)
+            if current_row == 0:
+                self._move(moves, "druld")
+        return moves if runs is not None else str(moves)
     
-    def solve_interior_tile(self, target_row, target_col):
+    def solve_interior_tile(self, target_row, target_col, runs=None):
         """
         Place correct tile at target position
-        Updates puzzle and returns a move string
+        Updates puzzle and returns a move string, or appends to runs
+        if given and returns it
         """
-        move_str = self.position_tile(target_row, target_col)
+        moves = MoveRuns() if runs is None else runs
+        self.position_tile(target_row, target_col, runs=moves)
 
         current_row, current_col = self.current_position(target_row, target_col)
-        move = ""
-        while current_col != target_col:
-            if current_col > target_col:
-                move += "rulld"
-                current_col -= 1
-            else: 
-                move += "urrdl"
-                current_col +=1
-        move_str += move
-
-        self.update_puzzle(move)
-        move = ""
-        while current_row != target_row:
-            move += "druld"            
-            current_row += 1 
-        move_str += move  
-
-        self.update_puzzle(move)
-        
-        return move_str
+        if current_col > target_col:
+            self._move(moves, "rulld", current_col - target_col)
+        else:
+            self._move(moves, "urrdl", target_col - current_col)
+        self._move(moves, "druld", target_row - current_row)
+        return moves if runs is not None else str(moves)
 
-    def solve_col0_tile(self, target_row):
+    def solve_col0_tile(self, target_row, runs=None):
         """
         Solve tile in column zero on specified row (> 1)
-        Updates puzzle and returns a move 
-        
+        Updates puzzle and returns a move string, or appends to runs
+        if given and returns it
         """
-        move_str = "ur"
-        self.update_puzzle("ur") 
+        moves = MoveRuns() if runs is None else runs
+        self._move(moves, "ur")
         current_row, current_col = self.current_position(target_row, 0)
         if current_row == target_row:
-            move_str += "r" * (self._width-2)        
-            self.update_puzzle("r" * (self._width-2))
-            return move_str
-        move_str += self.position_tile(target_row, 0, True)
+            self._move(moves, "r", self._width-2)
+            return moves if runs is not None else str(moves)
+        self.position_tile(target_row, 0, True, moves)
         current_row, current_col = self.current_position(target_row, 0)
-        move = ""
-        while current_col > 1:
-            move += "rulld"
-            current_col -= 1
-        move_str += move
-        self.update_puzzle(move)
-        move = ""
-        while current_row < target_row -1:
-            move += "druld"
-            current_row += 1 
-        move += "ruldrdlurdluurddlur" + "r" * (self._width - 2)
-        move_str += move       
-        self.update_puzzle(move)
-        return move_str
+        self._move(moves, "rulld", current_col - 1)
+        self._move(moves, "druld", (target_row - 1) - current_row)
+        self._move(moves, "ruldrdlurdluurddlur")
+        self._move(moves, "r", self._width - 2)
+        return moves if runs is not None else str(moves)
+
+    def plan_interior_tile(self, target_row, target_col, runs=None):
+        """
+        Place correct tile at target position along a path planned by
+        planner.place, leaving the puzzle as solve_interior_tile does
+        Updates puzzle and returns a move string, or appends to runs
+        if given and returns it
+        """
+        moves = MoveRuns() if runs is None else runs
+        target = (target_row, target_col)
+        plan, dummy = planner.place(
+            self._height, self._width, target, target,
+            self.current_position(target_row, target_col),
+            ((target, (target_row, target_col - 1)),))
+        for pattern, count in plan:
+            self._move(moves, pattern, count)
+        return moves if runs is not None else str(moves)
+
+    def plan_col0_tile(self, target_row, runs=None):
+        """
+        Solve tile in column zero on specified row (> 1), planning the
+        walk to the 3x2 macro's start with planner.place
+        Updates puzzle and returns a move string, or appends to runs
+        if given and returns it
+        """
+        moves = MoveRuns() if runs is None else runs
+        #either drop the tile straight in or set up the 3x2 macro
+        goals = (((target_row - 1, 1), (target_row - 1, 0)),
+                 ((target_row, 0), (target_row - 1, 0)))
+        plan, reached = planner.place(
+            self._height, self._width, (target_row, 0), (target_row, 0),
+            self.current_position(target_row, 0), goals)
+        for pattern, count in plan:
+            self._move(moves, pattern, count)
+        if reached == 0:
+            self._move(moves, "ruldrdlurdluurddlur")
+            self._move(moves, "r", self._width - 2)
+        else:
+            self._move(moves, "r", self._width - 1)
+        return moves if runs is not None else str(moves)
  
    
     #############################################################
@@ -277,12 +496,11 @@ class Puzzle:
             return False
         if self._solved_tiles[(1, target_col)] != self.get_number(1, target_col):
             return False        
-        tile_idx = self._indices.index((1,self._width-1))        
-        for cord in self._indices[tile_idx+1:]:
-            if self._solved_tiles[(cord[0], cord[1])] != self.get_number(
-                                                        cord[0],cord[1]):
-                    return False
-        if target_col > self._width - 1:
+        if self._solved_suffix_start() > 2 * self._width:
+            return False
+        #a linear scan: the solver never calls the row invariants, so
+        #rows 0 and 1 are not tracked per move the way the rest are
+        if target_col < self._width - 1:
             for col in range(target_col + 1, self._width):
                 if self._solved_tiles[(0, col)] != self.get_number(0, col):
                     return False         
@@ -301,11 +519,9 @@ class Puzzle:
         if zero_pos != (1,target_col):
             return False
         
-        tile_idx = self._indices.index((1,self._width-1))        
-        for cord in self._indices[tile_idx+1:]:
-            if self._solved_tiles[(cord[0], cord[1])] != self.get_number(
-                                                        cord[0],cord[1]):
-                    return False
+        if self._solved_suffix_start() > 2 * self._width:
+            return False
+        #linear in the width, as in row0_invariant
         if target_col < self._width - 1:
             for col in range(target_col + 1, self._width):
                 if self._solved_tiles[(0, col)] != self.get_number(0, col):
@@ -401,41 +617,143 @@ class Puzzle:
                 move_str += "rdlu"
                 self.update_puzzle("rdlu")
 
-    def solve_puzzle(self):
+    def solve_puzzle(self, mode="greedy"):
         """
         Generate a solution string for a puzzle
+        mode "greedy" solves row by row with fixed macros, mode
+        "optimal" runs IDA* and returns a shortest solution, mode
+        "anytime" shortens the greedy solution within a time budget
         Updates the puzzle and returns a move string
         """
-        count = 0
-        for tile in self._indices:
-            if self.get_number(tile[0], tile[1]) == self._solved_tiles[tile]:
-                count += 1
-            else: break
-        if count == len(self._indices):
-            return ""
-        #move zero to lower right of puzzle
-        zero_pos = self.current_position(0, 0)
-        move_str = "r" * ((self._width -1) - zero_pos[1])
-        move_str += "d" * ((self._height - 1) - zero_pos[0])
-        
-        self.update_puzzle(move_str)
+        return "".join(self.solve_puzzle_iter(mode))
+
+    def solve_puzzle_iter(self, mode="greedy", run_length=False):
+        """
+        Generate a solution for a puzzle one tile at a time
+        The puzzle is updated as chunks are consumed, so it always
+        reflects the moves yielded so far
+        Yields move strings, or MoveRuns if run_length is set
+        """
+        #a solved board is trivially solvable, so its early exit
+        #skips the O(n log n) parity count
+        assert self._misplaced == 0 or self.is_solvable(), (
+            "puzzle is not solvable")
+        if mode == "optimal":
+            steps = [("optimal", None, self._solve_optimal, ())]
+        elif mode == "anytime":
+            steps = [("anytime", None, self._solve_anytime, ())]
+        else:
+            assert mode == "greedy", "invalid solve mode: " + str(mode)
+            if self._misplaced == 0:
+                return
+            steps = self._greedy_steps(run_length)
+        for step, tile, method, args in steps:
+            if self._profiler is None:
+                moves = method(*args)
+            else:
+                moves = self._profiler.measure(step, tile, method, args)
+            if run_length and not isinstance(moves, MoveRuns):
+                moves = MoveRuns.from_string(moves)
+            yield moves
+
+    def solve_step_count(self, mode="greedy"):
+        """
+        Number of chunks solve_puzzle_iter will yield, for progress
+        reporting
+        Returns an integer
+        """
+        if mode in ("optimal", "anytime"):
+            return 1
+        if self._misplaced == 0:
+            return 0
+        return sum(1 for dummy_step in self._greedy_steps(False))
+
+    def _greedy_steps(self, run_length):
+        """
+        Steps of the greedy solver in order, phase one methods get a
+        fresh runs buffer each if run_length is set
+        Yields (step name, target tile, method, arguments) tuples
+        """
+        if run_length:
+            runs = MoveRuns
+        else:
+            runs = lambda: None
+        if self._height == 1 or self._width == 1:
+            yield ("line", None, self._zero_to_start, (runs(),))
+            return
+        yield ("setup", None, self._zero_to_corner, (runs(),))
         #solve lower rows
         for row in range(2,self._height)[::-1]:
             for col in range(1,self._width)[::-1]:
-               
-                move = self.solve_interior_tile(row,col)
-
-                move_str += move
-            move = self.solve_col0_tile(row)
-            
-            move_str += move
+                yield ("interior", (row, col), self.plan_interior_tile,
+                       (row, col, runs()))
+            yield ("col0", (row, 0), self.plan_col0_tile, (row, runs()))
 
         #solve right most width-2 cols in upper 2 rows
         for col in range(2, self._width)[::-1]:
-            move_str += self.solve_row1_tile(col)
-            move_str += self.solve_row0_tile(col)
-        move_str += self.solve_2x2()
+            yield ("row1", (1, col), self.solve_row1_tile, (col,))
+            yield ("row0", (0, col), self.solve_row0_tile, (col,))
+        yield ("2x2", (0, 0), self.solve_2x2, ())
+
+    def _zero_to_corner(self, runs=None):
+        """
+        Move zero to lower right of puzzle
+        Updates puzzle and returns a move string, or appends to runs
+        if given and returns it
+        """
+        moves = MoveRuns() if runs is None else runs
+        zero_pos = self.current_position(0, 0)
+        self._move(moves, "r", (self._width -1) - zero_pos[1])
+        self._move(moves, "d", (self._height - 1) - zero_pos[0])
+        return moves if runs is not None else str(moves)
+
+    def _zero_to_start(self, runs=None):
+        """
+        Slide zero to the top left of a one row or column puzzle,
+        whose tiles a solvable board already has in order
+        Updates puzzle and returns a move string, or appends to runs
+        if given and returns it
+        """
+        moves = MoveRuns() if runs is None else runs
+        zero_pos = self.current_position(0, 0)
+        self._move(moves, "l", zero_pos[1])
+        self._move(moves, "u", zero_pos[0])
+        return moves if runs is not None else str(moves)
+
+    def _solve_optimal(self):
+        """
+        Updates puzzle and returns a shortest move string
+        """
+        import search
+        move_str = search.solve_optimal(self)
+        self.update_puzzle(move_str)
+        return move_str
+
+    def _solve_anytime(self):
+        """
+        Updates puzzle and returns the shortest move string found
+        within the anytime solver's default budgets
+        """
+        import anytime
+        move_str = anytime.solve_anytime(self)
+        self.update_puzzle(move_str)
         return move_str
+
+    def solve_puzzle_runs(self, mode="greedy"):
+        """
+        Generate a run-length encoded solution, for boards too large
+        to hold every move as a character
+        Updates the puzzle and returns a MoveRuns
+        """
+        moves = MoveRuns()
+        for chunk in self.solve_puzzle_iter(mode, run_length=True):
+            moves.extend(chunk)
+        return moves
     
-# Start interactive simulation
-fifteengui.FifteenGUI(Puzzle(4, 4))
+if __name__ == "__main__":
+    # Start interactive simulation, optionally of another size:
+    # python fifteen.py [height width]
+    import sys
+    import fifteengui
+    size = [int(arg) for arg in sys.argv[1:3]] or [4, 4]
+    fifteengui.FifteenGUI(Puzzle(size[0], size[-1]))
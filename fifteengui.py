@@ -1,17 +1,25 @@
 """
-GUI for the Fifteen puzzle
+GUI for the Fifteen puzzle, runs under Python 2 or 3 with pygame
 """
 
-import os, sys, random
+import os, sys, random, threading, collections
+import boards
+import atlas
 import pygame
 from pygame.locals import *
 
-#initialize pygame
-pygame.init()
-
-#image and screen constants
-TILE_SIZE = 100
+#image and screen constants, tiles shrink to fit large boards
+TILE_SIZE = atlas.TILE_SIZE
 BORDER_SIZE = 50
+PROGRESS_HEIGHT = 8
+PROGRESS_COLOR = (240, 240, 240)
+
+#solution playback speeds in moves per second
+DEFAULT_SPEED = 4.0
+MIN_SPEED = 0.5
+MAX_SPEED = 4096.0
+#redraw everything once a frame dirties more cells than this
+MAX_DIRTY_CELLS = 64
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -30,90 +38,333 @@ def load_image(name, colorkey=None, alpha=False):
     fullname = resource_path(os.path.join('data', name))
     try:
         image = pygame.image.load(fullname)
-    except pygame.error, message:
-        print 'Cannot load image:', name
-        raise SystemExit, message
+    except pygame.error as message:
+        print('Cannot load image: %s' % name)
+        raise SystemExit(message)
     if alpha:
         image = image.convert_alpha()
     else:
         image = image.convert()
     if colorkey is not None:
-        if colorkey is -1:
+        if colorkey == -1:
             colorkey = image.get_at((0,0))
         image.set_colorkey(colorkey, RLEACCEL)
     return image, image.get_rect()
 
+class SolveWorker(threading.Thread):
+    """
+    Solve a copy of the puzzle on a background thread, handing move
+    chunks to the GUI as they are produced
+    """
+
+    def __init__(self, puzzle, mode="greedy"):
+        """
+        Snapshot puzzle and prepare to solve it
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._puzzle = puzzle.clone()
+        self._mode = mode
+        self._cancelled = threading.Event()
+        self._total = puzzle.solve_step_count(mode)
+        self._done = 0
+        self.chunks = collections.deque()
+        self.error = None
+
+    def run(self):
+        """
+        Solve, stopping between tiles if cancelled
+        """
+        try:
+            for chunk in self._puzzle.solve_puzzle_iter(self._mode):
+                if self._cancelled.is_set():
+                    return
+                self.chunks.append(chunk)
+                self._done += 1
+        except AssertionError as error:
+            self.error = error
+
+    def cancel(self):
+        """
+        Ask the worker to stop at the next tile
+        """
+        self._cancelled.set()
+
+    def progress(self):
+        """
+        Fraction of solver steps done
+        Returns a float between 0 and 1
+        """
+        if not self._total:
+            return 1.0
+        return min(1.0, float(self._done) / self._total)
+
+class Playback:
+    """
+    Frame-paced playback of solution chunks, consumed by index so
+    nothing is copied as moves are played
+    """
+
+    def __init__(self, speed=DEFAULT_SPEED):
+        """
+        Create an empty playback queue
+        """
+        self._chunks = collections.deque()
+        self._index = 0
+        self._speed = speed
+        self._budget = 0.0
+        self.skip = False
+
+    def add(self, moves):
+        """
+        Queue a chunk of moves
+        """
+        if moves:
+            self._chunks.append(moves)
+
+    def clear(self):
+        """
+        Drop every queued move and leave skip mode
+        """
+        self._chunks.clear()
+        self._index = 0
+        self._budget = 0.0
+        self.skip = False
+
+    def pending(self):
+        """
+        Whether any moves are queued
+        Returns a boolean
+        """
+        return bool(self._chunks)
+
+    def get_speed(self):
+        """
+        Returns moves per second
+        """
+        return self._speed
+
+    def scale_speed(self, factor):
+        """
+        Multiply the playback speed, within MIN_SPEED and MAX_SPEED
+        """
+        self._speed = max(MIN_SPEED, min(MAX_SPEED, self._speed * factor))
+
+    def take(self, elapsed):
+        """
+        Moves due after elapsed milliseconds, or every queued move in
+        skip mode
+        Returns a move string
+        """
+        if not self._chunks:
+            self._budget = 0.0
+            return ""
+        if self.skip:
+            count = sum(len(chunk) for chunk in self._chunks) - self._index
+        else:
+            self._budget += self._speed * elapsed / 1000.0
+            count = int(self._budget)
+            self._budget -= count
+        taken = []
+        while count > 0 and self._chunks:
+            chunk = self._chunks[0]
+            end = min(len(chunk), self._index + count)
+            taken.append(chunk[self._index:end])
+            count -= end - self._index
+            self._index = end
+            if self._index >= len(chunk):
+                self._chunks.popleft()
+                self._index = 0
+        return "".join(taken)
+
 class FifteenGUI:
     """
     Main GUI class
     """
 
-    def __init__(self, puzzle):
+    def __init__(self, puzzle, seed=None):
         """
-        Create screen 
+        Create screen, seed makes jumbles reproducible
         """
+        #initialize pygame
+        pygame.init()
         self._puzzle = puzzle
         self._puzzle_height = puzzle.get_height()
         self._puzzle_width = puzzle.get_width()
-        self._width = self._puzzle_width * TILE_SIZE + BORDER_SIZE * 2
-        self._height = self._puzzle_height * TILE_SIZE + BORDER_SIZE * 2
+        self._tile_size = atlas.tile_size_for(self._puzzle_height,
+                                              self._puzzle_width)
+        self._width = self._puzzle_width * self._tile_size + BORDER_SIZE * 2
+        self._height = self._puzzle_height * self._tile_size + BORDER_SIZE * 2
         self._screen = pygame.display.set_mode((self._width, self._height))
         self._screen_rect = self._screen.get_rect()
         pygame.display.set_caption('Fifteen')
-        self._background, dummy_rect = load_image('bg3.png', alpha=True)
-        self._loadscreen, dummy_rect = load_image('loadscreen.png', True)
-        self._tiles_sprite, dummy_rect = load_image('fifteen2.png', alpha=True)
+        #images other than the tiles load on first use
+        self._images = {}
         self._tiles = []
         self.make_tiles()
-        self._possible_moves = 'udlr'
-        self._solution = ""
-        self._jumblestr = ""
+        self._rng = random.Random(seed)
+        self._playback = Playback()
+        self._redraw = True
+        self._dirty = set()
+        self._worker = None
         self._current_moves = ""
         self._just_loaded = True
         self.main()
 
     def make_tiles(self):
         """
-        create list tiles by making subsurface for each tile
-        in tiles sprite sheet
+        create list of tiles from the atlas generated, or cached on
+        disk, for this board size and tile size
+        """
+        self._tiles = atlas.load_tiles(self._puzzle_height,
+                                       self._puzzle_width, self._tile_size)
+
+    def background(self):
+        """
+        Background image scaled to the window, loaded on first use
+        Returns a surface
+        """
+        if 'background' not in self._images:
+            image, rect = load_image('bg3.png', alpha=True)
+            if rect.size != self._screen_rect.size:
+                image = pygame.transform.smoothscale(image,
+                                                     self._screen_rect.size)
+            self._images['background'] = image
+        return self._images['background']
+
+    def loadscreen(self):
+        """
+        Instructions image scaled down to fit the board, loaded on
+        first use
+        Returns a surface
         """
-        num_tiles = self._puzzle_height * self._puzzle_width
-        #subsurface is a ract(left, top, width, height
-        
-        for idx in xrange(num_tiles):
-            self._tiles.append(self._tiles_sprite.subsurface(
-                (idx * TILE_SIZE, 0, TILE_SIZE, TILE_SIZE)))
+        if 'loadscreen' not in self._images:
+            image, rect = load_image('loadscreen.png', True)
+            side = min(self._width, self._height) - 2 * BORDER_SIZE
+            if rect.width > side:
+                image = pygame.transform.smoothscale(image, (side, side))
+            self._images['loadscreen'] = image
+        return self._images['loadscreen']
 
     def solve(self):
         """
         Event handler to generate solution string for given configuration
         """
-        new_puzzle = self._puzzle.clone()
-        self._solution = new_puzzle.solve_puzzle()
+        self.cancel()
+        #play moves as the worker produces them
+        self._worker = SolveWorker(self._puzzle)
+        self._worker.start()
 
-    def jumble(self):
+    def cancel(self):
         """
-        jumble puzzle tiles
+        Event handler to stop a running solve and its playback
         """
-        jumble_str = ""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._playback.clear()
 
-        for idx in xrange(100):
-            jumble_str += random.choice(self._possible_moves)
+    def busy(self):
+        """
+        Whether a solve is running or a solution is playing
+        Returns a boolean
+        """
+        return self._worker is not None or self._playback.pending()
+
+    def poll_worker(self):
+        """
+        Collect move chunks from the solve worker
+        """
+        worker = self._worker
+        if worker is None:
+            return
+        while worker.chunks:
+            self._playback.add(worker.chunks.popleft())
+        if not worker.is_alive() and not worker.chunks:
+            if worker.error is not None:
+                print("solve failed: %s" % worker.error)
+            self._worker = None
+
+    def play_moves(self, elapsed):
+        """
+        Apply the solution moves due after elapsed milliseconds,
+        noting the cells each move swaps; in skip mode the remaining
+        moves are applied in one update_puzzle call
+        """
+        moves = self._playback.take(elapsed)
+        if not moves:
+            return
+        if self._playback.skip or len(moves) > MAX_DIRTY_CELLS:
+            self._puzzle.update_puzzle(moves)
+            self._redraw = True
+            return
+        for direction in moves:
+            self._dirty.add(self._puzzle.current_position(0, 0))
+            self._puzzle.update_puzzle(direction)
+        self._dirty.add(self._puzzle.current_position(0, 0))
 
-        self._jumblestr = jumble_str
+    def skip_to_end(self):
+        """
+        Event handler to finish the current solution at once
+        """
+        self._playback.skip = True
+
+    def draw_progress(self):
+        """
+        Draw solve progress along the bottom border
+        Returns the rect drawn over
+        """
+        bar_width = self._width - 2 * BORDER_SIZE
+        top = self._height - (BORDER_SIZE + PROGRESS_HEIGHT) // 2
+        rect = pygame.Rect(BORDER_SIZE, top, bar_width, PROGRESS_HEIGHT)
+        self._screen.blit(self.background(), rect, rect)
+        if self._worker is not None:
+            pygame.draw.rect(self._screen, PROGRESS_COLOR, rect, 1)
+            pygame.draw.rect(self._screen, PROGRESS_COLOR,
+                             (BORDER_SIZE, top,
+                              int(bar_width * self._worker.progress()),
+                              PROGRESS_HEIGHT))
+        return rect
+
+    def draw_cells(self, cells):
+        """
+        Redraw background and tile for each (row, col) in cells
+        Returns a list of the rects drawn over
+        """
+        rects = []
+        size = self._tile_size
+        for row, col in cells:
+            rect = pygame.Rect(col * size + BORDER_SIZE,
+                               row * size + BORDER_SIZE, size, size)
+            self._screen.blit(self.background(), rect, rect)
+            self._screen.blit(self._tiles[self._puzzle.get_number(row, col)],
+                              rect)
+            rects.append(rect)
+        return rects
+
+    def jumble(self):
+        """
+        jumble puzzle tiles into a uniformly random solvable board
+        """
+        grid = boards.random_grid(self._puzzle_height, self._puzzle_width,
+                                  self._rng)
+        for row in range(self._puzzle_height):
+            for col in range(self._puzzle_width):
+                self._puzzle.set_number(row, col, grid[row][col])
     
     def print_moves(self):
         """
         Event handler to print and reset current move string
         """
-        print self._current_moves
+        print(self._current_moves)
         self._current_moves = ""
 
     def enter_moves(self, txt):
         """
         Event handler to enter move string
         """
-        self._solution = txt
+        self.cancel()
+        self._playback.add(txt)
 
     def keydown(self, event):
         """
@@ -122,30 +373,43 @@ class FifteenGUI:
         key = event.key
         if key == K_ESCAPE:
             sys.exit()
-        if key == K_UP:
+        #any key may change what is on screen
+        self._redraw = True
+        if key == K_c:
+            self.cancel()
+        elif key == K_f:
+            self.skip_to_end()
+        elif key in (K_PLUS, K_EQUALS, K_KP_PLUS):
+            self._playback.scale_speed(2)
+        elif key in (K_MINUS, K_KP_MINUS):
+            self._playback.scale_speed(0.5)
+        elif self.busy():
+            #ignore moves while a solution is being solved or played
+            pass
+        elif key == K_UP:
             try:
                 self._puzzle.update_puzzle("u")
                 self._current_moves += "u"
             except:
-                print "invalid move: up"
+                print("invalid move: up")
         elif key == K_DOWN:
             try:
                 self._puzzle.update_puzzle("d")
                 self._current_moves += "d"
             except:
-                print "invalid move: down"
+                print("invalid move: down")
         elif key == K_LEFT:
             try:
                 self._puzzle.update_puzzle("l")
                 self._current_moves += "l"
             except:
-                print "invalid move: left"
+                print("invalid move: left")
         elif key == K_RIGHT:
             try:
                 self._puzzle.update_puzzle("r")
                 self._current_moves += "r"
             except:
-                print "invalid move: right"
+                print("invalid move: right")
         elif key == K_s:
             self.solve()
 
@@ -155,6 +419,8 @@ class FifteenGUI:
         if self._just_loaded:
             if key == K_RETURN:
                 self._just_loaded = False
+                #never shown again
+                self._images.pop('loadscreen', None)
                 
 
     def update(self):
@@ -165,8 +431,8 @@ class FifteenGUI:
             for col in range(self._puzzle_width):
                 tile_num = self._puzzle.get_number(row, col)
                 self._screen.blit(self._tiles[tile_num],
-                                 (col * TILE_SIZE + BORDER_SIZE,
-                                  row * TILE_SIZE + BORDER_SIZE))
+                                 (col * self._tile_size + BORDER_SIZE,
+                                  row * self._tile_size + BORDER_SIZE))
                                   
             
     def main(self):
@@ -176,40 +442,32 @@ class FifteenGUI:
 
         clock = pygame.time.Clock()
         while 1:
-            clock.tick(30)
-            self._screen.blit(self._background, self._screen_rect)
+            elapsed = clock.tick(30)
             for event in pygame.event.get():
                 if event.type == QUIT:
                     sys.exit()
                 elif event.type == KEYDOWN:
                     self.keydown(event)
-            #redraw game in new tile positions
-            self.update()
-
-            #draw load screen if game just loaded
-            if self._just_loaded:
-                self._screen.blit(self._loadscreen, (BORDER_SIZE, BORDER_SIZE))
-
-            #draw through solution if s key pressed    
-            while self._solution:
-                self._puzzle.update_puzzle(self._solution[0])
-                self._solution = self._solution[1:]
-                self._screen.blit(self._background, self._screen_rect)
-                self.update()
-                pygame.display.flip()
-                pygame.time.wait(250)
-
-            #jumble puzzle if j key pressed    
-            while self._jumblestr:
-                try:
-                    self._puzzle.update_puzzle(self._jumblestr[0])
-                except AssertionError:
-                    #jumble is random and returns some off grid moves
-                    #ignore move remove from string
-                    self._jumblestr = self._jumblestr[1:]
-                    break
-                self._jumblestr = self._jumblestr[1:]
+
+            #play through solution if s key pressed, paced by the clock
+            self.poll_worker()
+            self.play_moves(elapsed)
+
+            if (self._redraw or self._just_loaded or
+                    len(self._dirty) > MAX_DIRTY_CELLS):
+                #redraw game in new tile positions
+                self._screen.blit(self.background(), self._screen_rect)
                 self.update()
+                #draw load screen if game just loaded
+                if self._just_loaded:
+                    self._screen.blit(self.loadscreen(),
+                                      (BORDER_SIZE, BORDER_SIZE))
+                self.draw_progress()
                 pygame.display.flip()
-                pygame.time.wait(125)
-            pygame.display.flip()
+            else:
+                #only the swapped tiles and the progress bar changed
+                rects = self.draw_cells(self._dirty)
+                rects.append(self.draw_progress())
+                pygame.display.update(rects)
+            self._redraw = False
+            self._dirty.clear()
@@ -0,0 +1,156 @@
+"""
+Run-length encoded move buffers
+
+The solver's macros are short patterns repeated many times ("rulld"
+once per column a tile travels, "u" once per row), so a solution is
+stored as (pattern, count) runs.  Patterns are interned once per
+process and runs are kept in two flat arrays, so a buffer costs a few
+bytes per run however many raw moves it stands for.
+"""
+
+import itertools
+from array import array
+
+#direction -> (row offset, col offset) of the tile the blank swaps with
+OFFSETS = {"l": (0, -1), "r": (0, 1), "u": (-1, 0), "d": (1, 0)}
+#direction -> the move undoing it, "" standing for no move at all
+INVERSE = {"l": "r", "r": "l", "u": "d", "d": "u", "": ""}
+
+def neighbors(height, width):
+    """
+    For every cell, the legal blank moves from that cell
+    Returns a list of lists of (direction, cell) tuples
+    """
+    table = []
+    for cell in range(height * width):
+        row, col = divmod(cell, width)
+        moves = []
+        for direction in "ulrd":
+            d_row, d_col = OFFSETS[direction]
+            if 0 <= row + d_row < height and 0 <= col + d_col < width:
+                moves.append((direction, (row + d_row) * width + col + d_col))
+        table.append(moves)
+    return table
+
+_PATTERNS = []
+_PATTERN_IDS = {}
+_COMPILED = {}
+
+def _intern(pattern):
+    """
+    Id of pattern in the process-wide pattern table
+    Returns an integer
+    """
+    if pattern not in _PATTERN_IDS:
+        _PATTERN_IDS[pattern] = len(_PATTERNS)
+        _PATTERNS.append(pattern)
+    return _PATTERN_IDS[pattern]
+
+def compile_pattern(pattern):
+    """
+    Blank offsets for each move of pattern, the net blank displacement
+    of one repetition and the bounding box of the blank's path,
+    relative to where the blank starts
+    Returns (steps, net_row, net_col, min_row, max_row, min_col, max_col)
+    """
+    if pattern not in _COMPILED:
+        steps = []
+        row = col = 0
+        rows = [0]
+        cols = [0]
+        for direction in pattern:
+            assert direction in OFFSETS, "invalid direction: " + direction
+            d_row, d_col = OFFSETS[direction]
+            steps.append((d_row, d_col))
+            row += d_row
+            col += d_col
+            rows.append(row)
+            cols.append(col)
+        _COMPILED[pattern] = (steps, row, col, min(rows), max(rows),
+                              min(cols), max(cols))
+    return _COMPILED[pattern]
+
+class MoveRuns(object):
+    """
+    Move string stored as runs of repeated patterns
+    """
+
+    __slots__ = ("_ids", "_counts")
+
+    def __init__(self):
+        """
+        Create an empty buffer
+        """
+        self._ids = array("I")
+        self._counts = array("L")
+
+    @classmethod
+    def from_string(cls, move_string):
+        """
+        Encode a plain move string as runs of single directions
+        Returns a MoveRuns
+        """
+        runs = cls()
+        for direction, group in itertools.groupby(move_string):
+            runs.append(direction, len(list(group)))
+        return runs
+
+    def append(self, pattern, count=1):
+        """
+        Add count repetitions of pattern, merging with the last run
+        when it repeats the same pattern
+        """
+        if count <= 0 or not pattern:
+            return
+        pattern_id = _intern(pattern)
+        if self._ids and self._ids[-1] == pattern_id:
+            self._counts[-1] += count
+        else:
+            self._ids.append(pattern_id)
+            self._counts.append(count)
+
+    def extend(self, other):
+        """
+        Append every run of another MoveRuns or a plain move string
+        """
+        if not isinstance(other, MoveRuns):
+            other = MoveRuns.from_string(other)
+        for pattern, count in other.runs():
+            self.append(pattern, count)
+
+    def runs(self):
+        """
+        Yields (pattern, count) pairs
+        """
+        for pattern_id, count in zip(self._ids, self._counts):
+            yield _PATTERNS[pattern_id], count
+
+    def num_runs(self):
+        """
+        Returns an integer
+        """
+        return len(self._ids)
+
+    def __len__(self):
+        """
+        Number of raw moves
+        """
+        return sum(len(pattern) * count for pattern, count in self.runs())
+
+    def __iter__(self):
+        """
+        Yields raw moves one direction at a time
+        """
+        for pattern, count in self.runs():
+            for dummy_idx in range(count):
+                for direction in pattern:
+                    yield direction
+
+    def __str__(self):
+        """
+        Expand to a plain move string
+        """
+        return "".join(pattern * count for pattern, count in self.runs())
+
+    def __repr__(self):
+        return "MoveRuns(%r)" % list(self.runs())
@@ -0,0 +1,233 @@
+"""
+Compact board states for search-heavy workloads
+
+A PackedState holds the same information as a Puzzle grid in a few
+dozen bytes: a 4x4 board (or anything up to 16 cells) is a single
+integer with 4 bits per cell, larger boards are a flat array of
+unsigned integers.  Cells are numbered row-major, so cell
+row * width + col holds the tile that Puzzle.get_number(row, col)
+would return.
+"""
+
+from array import array
+
+from fifteen import Puzzle
+from moves import OFFSETS
+
+def array_typecode(num_cells):
+    """
+    Smallest unsigned array typecode able to hold the tile values of
+    a board with num_cells cells
+    Returns a string
+    """
+    if num_cells <= 0x100:
+        return "B"
+    if num_cells <= 0x10000:
+        return "H"
+    return "I"
+
+class PackedState(object):
+    """
+    Compact, hashable board state
+
+    States are mutable through apply() for cheap move application; do
+    not mutate a state while it is stored in a set or used as a dict
+    key.  Use key() for an immutable snapshot instead.
+    """
+
+    __slots__ = ("_height", "_width", "_blank", "_tiles")
+
+    def __init__(self, height, width, tiles, blank):
+        """
+        Wrap already packed tiles, use from_grid/from_puzzle instead
+        """
+        self._height = height
+        self._width = width
+        self._tiles = tiles
+        self._blank = blank
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Pack a list of lists of tile values
+        Returns a PackedState
+        """
+        height = len(grid)
+        width = len(grid[0])
+        values = [value for row in grid for value in row]
+        blank = values.index(0)
+        if height * width <= 16:
+            tiles = 0
+            for cell, value in enumerate(values):
+                tiles |= value << (4 * cell)
+        else:
+            tiles = array(array_typecode(height * width), values)
+        return cls(height, width, tiles, blank)
+
+    @classmethod
+    def from_key(cls, height, width, key):
+        """
+        Rebuild a state from the value returned by key()
+        Returns a PackedState
+        """
+        if height * width <= 16:
+            blank = 0
+            while (key >> (4 * blank)) & 0xF:
+                blank += 1
+            return cls(height, width, key, blank)
+        tiles = array(array_typecode(height * width))
+        tiles.frombytes(key)
+        return cls(height, width, tiles, tiles.index(0))
+
+    @classmethod
+    def from_puzzle(cls, puzzle):
+        """
+        Pack the current state of a Puzzle
+        Returns a PackedState
+        """
+        return cls.from_grid([[puzzle.get_number(row, col)
+                               for col in range(puzzle.get_width())]
+                              for row in range(puzzle.get_height())])
+
+    @classmethod
+    def solved(cls, height, width):
+        """
+        Goal state matching Puzzle's solved layout
+        Returns a PackedState
+        """
+        return cls.from_grid([[col + width * row for col in range(width)]
+                              for row in range(height)])
+
+    def __str__(self):
+        """
+        Same rendering as Puzzle.__str__
+        Returns a string
+        """
+        return str(self.to_puzzle())
+
+    def __repr__(self):
+        """
+        Returns a string
+        """
+        return "PackedState(%d, %d, %r)" % (self._height, self._width,
+                                            self.to_grid())
+
+    def __eq__(self, other):
+        """
+        States are equal when their boards are equal
+        """
+        if not isinstance(other, PackedState):
+            return NotImplemented
+        return (self._height == other._height and
+                self._width == other._width and
+                self._tiles == other._tiles)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self):
+        """
+        Immutable encoding of the board, an int for boards of up
+        to 16 cells and bytes otherwise
+        Returns an int or bytes
+        """
+        if isinstance(self._tiles, array):
+            return self._tiles.tobytes()
+        return self._tiles
+
+    def get_height(self):
+        """
+        Returns an integer
+        """
+        return self._height
+
+    def get_width(self):
+        """
+        Returns an integer
+        """
+        return self._width
+
+    def get_blank(self):
+        """
+        Cell index of the blank tile
+        Returns an integer
+        """
+        return self._blank
+
+    def get_cell(self, cell):
+        """
+        Tile value at the row-major cell index
+        Returns an integer
+        """
+        if isinstance(self._tiles, array):
+            return self._tiles[cell]
+        return (self._tiles >> (4 * cell)) & 0xF
+
+    def get_number(self, row, col):
+        """
+        Tile value at (row, col)
+        Returns an integer
+        """
+        return self.get_cell(row * self._width + col)
+
+    def copy(self):
+        """
+        Returns an independent PackedState
+        """
+        tiles = self._tiles
+        if isinstance(tiles, array):
+            tiles = array(tiles.typecode, tiles)
+        return PackedState(self._height, self._width, tiles, self._blank)
+
+    def is_solved(self):
+        """
+        Returns a boolean
+        """
+        return self == PackedState.solved(self._height, self._width)
+
+    def move(self, direction):
+        """
+        Swap the blank with its neighbour in the given direction,
+        same semantics as Puzzle.update_puzzle
+        """
+        d_row, d_col = OFFSETS[direction]
+        blank = self._blank
+        row = blank // self._width + d_row
+        col = blank % self._width + d_col
+        assert (0 <= row < self._height and
+                0 <= col < self._width), "move off grid: " + direction
+        cell = row * self._width + col
+        if isinstance(self._tiles, array):
+            self._tiles[blank] = self._tiles[cell]
+            self._tiles[cell] = 0
+        else:
+            value = (self._tiles >> (4 * cell)) & 0xF
+            self._tiles += (value << (4 * blank)) - (value << (4 * cell))
+        self._blank = cell
+
+    def apply(self, move_string):
+        """
+        Apply a move string in place
+        """
+        for direction in move_string:
+            self.move(direction)
+
+    def to_grid(self):
+        """
+        Returns a list of lists of tile values
+        """
+        return [[self.get_cell(row * self._width + col)
+                 for col in range(self._width)]
+                for row in range(self._height)]
+
+    def to_puzzle(self):
+        """
+        Returns a Puzzle in the same state
+        """
+        return Puzzle(self._height, self._width, self.to_grid())
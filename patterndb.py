@@ -0,0 +1,290 @@
+"""
+Additive pattern databases for the optimal solver
+
+Tiles are split into disjoint groups.  For each group a table stores,
+for every placement of that group's tiles, the fewest moves of those
+tiles needed to reach their goal cells.  Moves of other tiles are free,
+so the tables can be summed and the total is still a lower bound.
+
+Tables use a sparse index: a group (t0, t1, ...) whose tiles sit in
+cells (p0, p1, ...) of an n-cell board is stored at
+p0 + p1 * n + p2 * n**2 + ...  Moving tile ti between cells a and b
+changes the index by (b - a) * n**i, so the solver updates it in
+constant time per move.
+
+Build once, then every solver process memory-maps the same file:
+
+    python patterndb.py [--size 4x4] [--partition 6-6-3] [--output FILE]
+"""
+
+import os, sys, mmap, struct, argparse, time
+from array import array
+
+MAGIC = b"FPDB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHH")
+GROUP = struct.Struct("<QQ")
+UNKNOWN = 255
+
+#named partitions of the tiles for the goal layout of Puzzle
+PARTITIONS = {
+    (3, 3): {"4-4": [[1, 2, 3, 4], [5, 6, 7, 8]]},
+    (4, 4): {"6-6-3": [[4, 5, 8, 9, 12, 13], [6, 7, 10, 11, 14, 15],
+                       [1, 2, 3]],
+             "5-5-5": [[1, 4, 5, 8, 12], [2, 3, 6, 7, 11],
+                       [9, 10, 13, 14, 15]]},
+}
+DEFAULT_PARTITION = {(3, 3): "4-4", (4, 4): "6-6-3"}
+
+def default_path(height, width):
+    """
+    Location of the database file for a board size
+    Returns a string
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data",
+                        "fifteen-%dx%d.pdb" % (height, width))
+
+def _neighbors(height, width):
+    """
+    Adjacent cells for every cell
+    Returns a list of lists of integers
+    """
+    table = []
+    for cell in range(height * width):
+        row, col = divmod(cell, width)
+        cells = []
+        if row > 0:
+            cells.append(cell - width)
+        if row < height - 1:
+            cells.append(cell + width)
+        if col > 0:
+            cells.append(cell - 1)
+        if col < width - 1:
+            cells.append(cell + 1)
+        table.append(cells)
+    return table
+
+def build_table(height, width, tiles):
+    """
+    Breadth-first search backwards from the goal over placements of
+    tiles.  The blank roams freely through cells no group tile
+    occupies, so each search node is a placement plus the region the
+    blank is confined to, and only group tile moves cost anything.
+    Returns a bytearray indexed by the sparse placement index
+    """
+    num_cells = height * width
+    adjacent = _neighbors(height, width)
+    weights = [num_cells ** slot for slot in range(len(tiles))]
+    table = bytearray([UNKNOWN]) * (num_cells ** len(tiles))
+    #per placement, bitmask of blank cells already covered by a region
+    assert num_cells <= 64, "board too large for a pattern database"
+    typecode = "H" if num_cells <= 16 else "I" if num_cells <= 32 else "Q"
+    visited = array(typecode, [0]) * len(table)
+
+    start = sum(tile * weight for tile, weight in zip(tiles, weights))
+    frontier = array("Q", [start * num_cells])
+    depth = 0
+    while frontier:
+        following = array("Q")
+        for state in frontier:
+            index, blank = divmod(state, num_cells)
+            if visited[index] >> blank & 1:
+                continue
+            if table[index] == UNKNOWN:
+                table[index] = depth
+            occupied = {}
+            rest = index
+            for slot in range(len(tiles)):
+                rest, cell = divmod(rest, num_cells)
+                occupied[cell] = slot
+            #flood the blank's region, collecting moves into it
+            region = 1 << blank
+            stack = [blank]
+            while stack:
+                cell = stack.pop()
+                for other in adjacent[cell]:
+                    if other in occupied:
+                        moved = index + (cell - other) * weights[occupied[other]]
+                        if not visited[moved] >> other & 1:
+                            following.append(moved * num_cells + other)
+                    elif not region >> other & 1:
+                        region |= 1 << other
+                        stack.append(other)
+            visited[index] |= region
+        frontier = following
+        depth += 1
+    return table
+
+def write_database(path, height, width, groups, tables):
+    """
+    Write tables to path; header, group directory, then raw tables
+    """
+    directory = b""
+    offset = HEADER.size
+    for tiles in groups:
+        offset += 2 + 2 * len(tiles) + GROUP.size
+    for tiles, table in zip(groups, tables):
+        directory += struct.pack("<H%dH" % len(tiles), len(tiles), *tiles)
+        directory += GROUP.pack(offset, len(table))
+        offset += len(table)
+    with open(path + ".tmp", "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, height, width, len(groups)))
+        out.write(directory)
+        for table in tables:
+            out.write(table)
+    os.rename(path + ".tmp", path)
+
+def build_database(height, width, groups, path, verbose=False):
+    """
+    Build every group's table and write them to path
+    """
+    tables = []
+    for tiles in groups:
+        start = time.time()
+        tables.append(build_table(height, width, tiles))
+        if verbose:
+            print("group %s: %d entries, %.1fs" % (
+                tiles, len(tables[-1]), time.time() - start))
+    write_database(path, height, width, groups, tables)
+
+class PatternTables(object):
+    """
+    Read-only view of a database file, memory-mapped so the tables are
+    read straight out of the page cache and any number of processes
+    share one copy
+    """
+
+    def __init__(self, path):
+        """
+        Map the database file at path
+        """
+        with open(path, "rb") as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, height, width, count = HEADER.unpack_from(self._map, 0)
+        assert magic == MAGIC and version == VERSION, "bad database: " + path
+        self.height = height
+        self.width = width
+        view = memoryview(self._map)
+        self.tables = []
+        self.group_of = [None] * (height * width)
+        self.weight = [0] * (height * width)
+        pos = HEADER.size
+        for group in range(count):
+            size = struct.unpack_from("<H", self._map, pos)[0]
+            tiles = struct.unpack_from("<%dH" % size, self._map, pos + 2)
+            pos += 2 + 2 * size
+            offset, length = GROUP.unpack_from(self._map, pos)
+            pos += GROUP.size
+            self.tables.append(view[offset:offset + length])
+            for slot, tile in enumerate(tiles):
+                self.group_of[tile] = group
+                self.weight[tile] = (height * width) ** slot
+        assert None not in self.group_of[1:], "partition misses tiles: " + path
+
+class PatternDatabase(object):
+    """
+    Additive pattern database heuristic
+
+    Follows the same reset/update/undo protocol as
+    search.ManhattanConflict.  Each search needs its own instance;
+    instances over the same PatternTables share the mapped tables.
+    """
+
+    def __init__(self, tables):
+        """
+        Heuristic over a PatternTables
+        """
+        self._tables = tables.tables
+        self._group_of = tables.group_of
+        self._weight = tables.weight
+        self._index = [0] * len(self._tables)
+        self._value = 0
+        self._history = []
+
+    def value(self):
+        """
+        Current heuristic estimate
+        Returns an integer
+        """
+        return self._value
+
+    def reset(self, board):
+        """
+        Compute the heuristic from scratch for board
+        Returns an integer
+        """
+        self._index = [0] * len(self._tables)
+        for cell, tile in enumerate(board):
+            if tile:
+                self._index[self._group_of[tile]] += cell * self._weight[tile]
+        self._value = sum(table[index]
+                          for table, index in zip(self._tables, self._index))
+        self._history = []
+        return self._value
+
+    def update(self, tile, src, dst):
+        """
+        Account for tile having moved from cell src to cell dst
+        Returns the new heuristic value
+        """
+        group = self._group_of[tile]
+        table = self._tables[group]
+        index = self._index[group]
+        moved = index + (dst - src) * self._weight[tile]
+        self._history.append((group, index, self._value))
+        self._index[group] = moved
+        self._value += table[moved] - table[index]
+        return self._value
+
+    def undo(self):
+        """
+        Revert the most recent update()
+        """
+        group, index, self._value = self._history.pop()
+        self._index[group] = index
+
+_LOADED = {}
+
+def load(height, width, path=None):
+    """
+    Heuristic over the database for a board size, mapping the file
+    only once per process
+    Returns a PatternDatabase, or None if no database has been built
+    """
+    path = path or default_path(height, width)
+    if path not in _LOADED:
+        if not os.path.exists(path):
+            return None
+        tables = PatternTables(path)
+        assert (tables.height, tables.width) == (
+            height, width), "database is for another board size: " + path
+        _LOADED[path] = tables
+    return PatternDatabase(_LOADED[path])
+
+def main():
+    parser = argparse.ArgumentParser(description="build a pattern database")
+    parser.add_argument("--size", default="4x4", help="board size HxW")
+    parser.add_argument("--partition",
+                        help="named partition, or groups such as 1,2,3/4,5")
+    parser.add_argument("--output", help="database file to write")
+    args = parser.parse_args()
+
+    height, width = [int(dim) for dim in args.size.split("x")]
+    named = PARTITIONS.get((height, width), {})
+    partition = args.partition or DEFAULT_PARTITION.get((height, width))
+    if partition in named:
+        groups = named[partition]
+    elif partition:
+        groups = [[int(tile) for tile in group.split(",")]
+                  for group in partition.split("/")]
+    else:
+        sys.exit("no default partition for %s, pass --partition" % args.size)
+    covered = sorted(tile for group in groups for tile in group)
+    if covered != list(range(1, height * width)):
+        sys.exit("partition must cover tiles 1..%d once each"
+                 % (height * width - 1))
+    build_database(height, width, groups,
+                   args.output or default_path(height, width), verbose=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Local search placement of single tiles for the greedy solver
+
+Phase one places one tile at a time while the cells after it are
+already solved.  Only the blank and that tile matter for placing it, so
+a placement is a shortest path for the (blank, tile) pair that keeps
+the blank off solved cells, found by breadth-first search in a small
+window around the blank, the tile and its goal.  Plans are cached by
+the shape of the window and the positions in it relative to its
+corner, so after the first few boards nearly every placement is a
+table lookup.
+
+Searching is only worth it near the target.  A tile further than
+RADIUS rows or columns away is first brought within RADIUS by fixed
+macros, 6 moves per diagonal step and 5 per straight one, whose repeat
+counts follow from the distances, so a long trip costs a few runs and
+no lookups.
+"""
+
+from collections import deque
+
+from moves import OFFSETS
+
+RADIUS = 4
+
+_PLANS = {}
+
+def _search(rows, cols, last_free, blank, tile, goals):
+    """
+    Fewest blank moves taking blank and tile to one of goals, a tuple
+    of (tile, blank) cell pairs, inside a rows x cols window whose
+    bottom row is free only up to column last_free
+    Returns (move string, index of the goal reached)
+    """
+    size = rows * cols
+    neighbors = []
+    for cell in range(size):
+        row, col = divmod(cell, cols)
+        neighbors.append([(direction, (row + d_row) * cols + col + d_col)
+                          for direction, (d_row, d_col) in OFFSETS.items()
+                          if 0 <= row + d_row < rows and
+                          0 <= col + d_col < cols and
+                          (row + d_row < rows - 1 or col + d_col <= last_free)])
+    targets = {}
+    for number, (goal_tile, goal_blank) in enumerate(goals):
+        targets[(goal_blank[0] * cols + goal_blank[1]) * size +
+                goal_tile[0] * cols + goal_tile[1]] = number
+    start = (blank[0] * cols + blank[1]) * size + tile[0] * cols + tile[1]
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        if state in targets:
+            reached = targets[state]
+            path = []
+            while parents[state] is not None:
+                state, direction = parents[state]
+                path.append(direction)
+            return "".join(reversed(path)), reached
+        blank_cell, tile_cell = divmod(state, size)
+        for direction, cell in neighbors[blank_cell]:
+            #the blank swaps with whatever it moves onto, the tile included
+            following = cell * size + (blank_cell if cell == tile_cell
+                                       else tile_cell)
+            if following not in parents:
+                parents[following] = (state, direction)
+                queue.append(following)
+    assert False, "no placement plan"
+
+def plan(height, width, floor, blank, tile, goals):
+    """
+    Shortest placement on a height x width board where the cells after
+    floor, a (row, col) cell in row-major order, are solved; goals is a
+    tuple of (tile cell, blank cell) pairs
+    Returns (move string, index of the goal reached)
+    """
+    #window: bounding box of every cell involved plus a margin of one
+    top = bottom = blank[0]
+    left = right = blank[1]
+    for row, col in (tile,) + sum(goals, ()):
+        if row < top:
+            top = row
+        elif row > bottom:
+            bottom = row
+        if col < left:
+            left = col
+        elif col > right:
+            right = col
+    top = top - 1 if top > 0 else 0
+    left = left - 1 if left > 0 else 0
+    right = right + 1 if right < width - 1 else right
+    if bottom + 1 < floor[0]:
+        bottom += 1
+        last_free = right - left
+    else:
+        bottom = floor[0]
+        last_free = max(-1, min(right, floor[1]) - left)
+    key = (bottom - top + 1, right - left + 1, last_free,
+           (blank[0] - top, blank[1] - left), (tile[0] - top, tile[1] - left),
+           tuple(((goal_tile[0] - top, goal_tile[1] - left),
+                  (goal_blank[0] - top, goal_blank[1] - left))
+                 for goal_tile, goal_blank in goals))
+    if key not in _PLANS:
+        _PLANS[key] = _search(*key)
+    return _PLANS[key]
+
+def _approach(floor, tile):
+    """
+    Blank moves from floor to a cell next to a tile more than RADIUS
+    away, facing the way the tile goes next
+    Returns (list of (pattern, count) runs, blank cell)
+    """
+    floor_row, floor_col = floor
+    tile_row, tile_col = tile
+    if tile_row == floor_row:
+        return ([("l", floor_col - tile_col - 1)],
+                (tile_row, tile_col + 1))
+    if tile_row + 1 < floor_row or tile_col <= floor_col:
+        across = "l" if tile_col < floor_col else "r"
+        return ([("u", floor_row - tile_row - 1),
+                 (across, abs(floor_col - tile_col))],
+                (tile_row + 1, tile_col))
+    #right of the floor one row up: below the tile is solved
+    return [("u", 1), ("r", tile_col - 1 - floor_col)], (tile_row,
+                                                        tile_col - 1)
+
+def _travel(blank, tile, heading, radius):
+    """
+    Macro runs bringing a far tile, with the blank next to it as left
+    by _approach, within radius of heading: diagonally while both
+    distances exceed radius, then straight along the longer one
+    Returns (list of (pattern, count) runs, blank cell, tile cell)
+    """
+    runs = []
+    row, col = tile
+    offset = (blank[0] - row, blank[1] - col)
+    d_row = heading[0] - row
+    d_col = heading[1] - col
+    across = 1 if d_col > 0 else -1
+    if offset == (1, 0):
+        #the blank stays below, so the rows above are never touched
+        steps = min(d_row, abs(d_col)) - radius
+        if steps > 0:
+            _append(runs, "urdldr" if across > 0 else "uldrdl", steps)
+            row += steps
+            col += across * steps
+            d_row -= steps
+            d_col -= across * steps
+        steps = d_row - radius
+        if steps > 0:
+            _append(runs, "ulddr" if col > 0 else "urddl", steps)
+            row += steps
+    steps = abs(d_col) - radius
+    if steps > 0:
+        if offset == (1, 0):
+            #round from below to the side the tile travels to
+            _append(runs, ("r" if across > 0 else "l") + "u")
+            offset = (0, across)
+        if row > 0:
+            _append(runs, "lurrd" if across > 0 else "rulld", steps)
+        else:
+            _append(runs, "ldrru" if across > 0 else "rdllu", steps)
+        col += across * steps
+    return runs, (row + offset[0], col + offset[1]), (row, col)
+
+def _append(runs, pattern, count=1):
+    """
+    Add a run to a list of runs, merging it with the last one if the
+    patterns match
+    """
+    if count <= 0 or not pattern:
+        return
+    if runs and runs[-1][0] == pattern:
+        runs[-1] = (pattern, runs[-1][1] + count)
+    else:
+        runs.append((pattern, count))
+
+def place(height, width, floor, blank, tile, goals, radius=RADIUS):
+    """
+    Moves placing a tile at one of goals, as for plan; a tile more
+    than radius rows or columns from the first goal is brought within
+    radius of it by macros first
+    Returns (list of (pattern, count) runs, index of the goal reached)
+    """
+    runs = []
+    heading = goals[0][0]
+    far = lambda cell: (abs(heading[0] - cell[0]) > radius or
+                        abs(heading[1] - cell[1]) > radius)
+    if far(tile):
+        approach, blank = _approach(floor, tile)
+        for pattern, count in approach:
+            _append(runs, pattern, count)
+        travel, blank, tile = _travel(blank, tile, heading, radius)
+        runs.extend(travel)
+    moves, reached = plan(height, width, floor, blank, tile, goals)
+    _append(runs, moves)
+    return runs, reached
@@ -0,0 +1,93 @@
+"""
+Per-phase and per-tile instrumentation for Puzzle.solve_puzzle
+
+    profiler = SolveProfiler()
+    puzzle.set_profiler(profiler)
+    puzzle.solve_puzzle()
+    report = profiler.report()
+
+Each solver step (one tile, or the whole search in optimal and anytime
+modes) produces a record with its wall time, moves, update calls and
+current_position lookups.  Records are kept for report() and passed
+to an optional callback as they happen.
+"""
+
+import time
+
+#solver step -> phase it belongs to
+PHASES = {"setup": "setup", "interior": "one", "col0": "one",
+          "row1": "two", "row0": "two", "2x2": "three",
+          "line": "setup", "optimal": "optimal", "anytime": "anytime"}
+
+class SolveProfiler(object):
+    """
+    Collects one record per solver step
+    """
+
+    def __init__(self, callback=None, keep_records=True):
+        """
+        callback is called with each record dictionary; set
+        keep_records to False to only stream records to it
+        """
+        self._callback = callback
+        self._keep_records = keep_records
+        self._records = []
+        self._counts = {"updates": 0, "lookups": 0}
+
+    def counting(self, counter, method):
+        """
+        Wrap method so every call bumps counter
+        Returns a function
+        """
+        counts = self._counts
+
+        def counted(*args):
+            counts[counter] += 1
+            return method(*args)
+        return counted
+
+    def measure(self, step, tile, method, args):
+        """
+        Run one solver step and record it
+        Returns the step's moves
+        """
+        updates = self._counts["updates"]
+        lookups = self._counts["lookups"]
+        start = time.time()
+        moves = method(*args)
+        record = {"phase": PHASES[step], "step": step, "tile": tile,
+                  "seconds": time.time() - start, "moves": len(moves),
+                  "updates": self._counts["updates"] - updates,
+                  "lookups": self._counts["lookups"] - lookups}
+        if self._keep_records:
+            self._records.append(record)
+        if self._callback is not None:
+            self._callback(record)
+        return moves
+
+    def records(self):
+        """
+        Returns the list of step records so far
+        """
+        return self._records
+
+    def reset(self):
+        """
+        Forget all records
+        """
+        self._records = []
+
+    def report(self):
+        """
+        Totals per phase alongside the per-tile records
+        Returns a dictionary
+        """
+        phases = {}
+        for record in self._records:
+            totals = phases.setdefault(record["phase"], {
+                "seconds": 0.0, "moves": 0, "updates": 0, "lookups": 0,
+                "steps": 0})
+            for key in ("seconds", "moves", "updates", "lookups"):
+                totals[key] += record[key]
+            totals["steps"] += 1
+        return {"phases": phases, "tiles": list(self._records)}
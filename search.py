@@ -0,0 +1,366 @@
+"""
+Optimal solver for the Fifteen puzzle
+
+Iterative-deepening A* over a flat, row-major copy of the board.
+Heuristics are updated incrementally as tiles move instead of being
+recomputed from scratch at every node.
+
+parallel_ida_star spreads one search over several processes: the tree
+is cut at a shallow depth and each iteration's subtrees are searched
+by a pool of workers, all against the same bound.
+"""
+
+import os, multiprocessing
+
+import boards, patterndb, distances
+from moves import INVERSE, neighbors
+
+FOUND = -1
+
+#boards up to this many cells are searched quickly without any tables
+UNAIDED_CELLS = 9
+
+def flatten(puzzle):
+    """
+    Row-major list of tile values for a Puzzle
+    Returns a list of integers
+    """
+    return [puzzle.get_number(row, col)
+            for row in range(puzzle.get_height())
+            for col in range(puzzle.get_width())]
+
+def _line_conflicts(goals):
+    """
+    Number of tiles that must leave a line so the rest are in goal
+    order, i.e. the line length minus its longest increasing subsequence
+    Returns an integer
+    """
+    longest = []
+    for goal in goals:
+        length = 1
+        for idx in range(len(longest)):
+            if goals[idx] < goal and longest[idx] + 1 > length:
+                length = longest[idx] + 1
+        longest.append(length)
+    return len(goals) - max(longest or [0])
+
+class ManhattanConflict(object):
+    """
+    Manhattan distance plus linear conflicts, kept up to date per move
+
+    Moving a tile only changes its own Manhattan term and the conflict
+    counts of the two lines it leaves and enters, so update() touches
+    those and nothing else.
+    """
+
+    def __init__(self, height, width):
+        """
+        Precompute goal coordinates for every tile
+        """
+        self._height = height
+        self._width = width
+        self._goal_row = [tile // width for tile in range(height * width)]
+        self._goal_col = [tile % width for tile in range(height * width)]
+        self._board = None
+        self._manhattan = 0
+        self._row_conflicts = []
+        self._col_conflicts = []
+        self._conflicts = 0
+        self._history = []
+        self._cache = {}
+
+    def _row_conflict(self, row):
+        """
+        Conflict count of tiles in row that belong to row
+        """
+        start = row * self._width
+        goals = tuple(self._goal_col[tile]
+                      for tile in self._board[start:start + self._width]
+                      if tile and self._goal_row[tile] == row)
+        if goals not in self._cache:
+            self._cache[goals] = _line_conflicts(goals)
+        return self._cache[goals]
+
+    def _col_conflict(self, col):
+        """
+        Conflict count of tiles in col that belong to col
+        """
+        goals = tuple(self._goal_row[tile]
+                      for tile in self._board[col::self._width]
+                      if tile and self._goal_col[tile] == col)
+        if goals not in self._cache:
+            self._cache[goals] = _line_conflicts(goals)
+        return self._cache[goals]
+
+    def value(self):
+        """
+        Current heuristic estimate
+        Returns an integer
+        """
+        return self._manhattan + 2 * self._conflicts
+
+    def reset(self, board):
+        """
+        Compute the heuristic from scratch for board, which is shared
+        with the caller and must be updated before calling update()
+        Returns an integer
+        """
+        self._board = board
+        self._history = []
+        self._manhattan = 0
+        for cell, tile in enumerate(board):
+            if tile:
+                row, col = divmod(cell, self._width)
+                self._manhattan += (abs(row - self._goal_row[tile]) +
+                                    abs(col - self._goal_col[tile]))
+        self._row_conflicts = [self._row_conflict(row)
+                               for row in range(self._height)]
+        self._col_conflicts = [self._col_conflict(col)
+                               for col in range(self._width)]
+        self._conflicts = sum(self._row_conflicts) + sum(self._col_conflicts)
+        return self.value()
+
+    def update(self, tile, src, dst):
+        """
+        Account for tile having moved from cell src to cell dst
+        Returns the new heuristic value
+        """
+        width = self._width
+        src_row, src_col = divmod(src, width)
+        dst_row, dst_col = divmod(dst, width)
+        if src_row == dst_row:
+            goal = self._goal_col[tile]
+            delta = abs(dst_col - goal) - abs(src_col - goal)
+            lines, compute = self._col_conflicts, self._col_conflict
+            first, second = src_col, dst_col
+        else:
+            goal = self._goal_row[tile]
+            delta = abs(dst_row - goal) - abs(src_row - goal)
+            lines, compute = self._row_conflicts, self._row_conflict
+            first, second = src_row, dst_row
+        self._history.append((self._manhattan, self._conflicts, lines,
+                              first, lines[first], second, lines[second]))
+        self._manhattan += delta
+        for line in (first, second):
+            count = compute(line)
+            self._conflicts += count - lines[line]
+            lines[line] = count
+        return self.value()
+
+    def undo(self):
+        """
+        Revert the most recent update()
+        """
+        (self._manhattan, self._conflicts, lines,
+         first, first_count, second, second_count) = self._history.pop()
+        lines[first] = first_count
+        lines[second] = second_count
+
+def _bounded_search(board, heuristic, moves, path):
+    """
+    Depth-first search over board, which is updated in place along
+    with heuristic and path
+    Returns a search(blank, depth, bound, estimate, last) function
+    """
+
+    def search(blank, depth, bound, estimate, last):
+        """
+        Depth-first search below blank, pruning at bound
+        Returns FOUND or the smallest f-value above bound
+        """
+        if estimate == 0:
+            return FOUND
+        smallest = None
+        backwards = INVERSE[last]
+        for direction, cell in moves[blank]:
+            if direction == backwards:
+                continue
+            tile = board[cell]
+            board[blank] = tile
+            board[cell] = 0
+            child = heuristic.update(tile, cell, blank)
+            cost = depth + 1 + child
+            if cost <= bound:
+                path.append(direction)
+                cost = search(cell, depth + 1, bound, child, direction)
+                if cost == FOUND:
+                    return FOUND
+                path.pop()
+            board[cell] = tile
+            board[blank] = 0
+            heuristic.undo()
+            if smallest is None or cost < smallest:
+                smallest = cost
+        return smallest
+    return search
+
+def ida_star(height, width, board, heuristic=None):
+    """
+    Find a shortest move string taking board to the solved state
+    Returns a string
+    """
+    assert boards.is_solvable(height, width, board), "puzzle is not solvable"
+    board = list(board)
+    if heuristic is None:
+        heuristic = ManhattanConflict(height, width)
+    path = []
+    search = _bounded_search(board, heuristic, neighbors(height, width), path)
+    bound = heuristic.reset(board)
+    blank = board.index(0)
+    while True:
+        result = search(blank, 0, bound, bound, "")
+        if result == FOUND:
+            return "".join(path)
+        bound = result
+
+def _frontier(board, heuristic, moves, depth):
+    """
+    Every path of exactly depth moves without immediate reversals,
+    plus the shortest solution seen on the way if any
+    Returns (list of (path string, estimate) pairs, solution or None)
+    """
+    frontier = []
+    solutions = []
+    path = []
+
+    def expand(blank, estimate, last):
+        if estimate == 0:
+            solutions.append("".join(path))
+        if len(path) == depth:
+            frontier.append(("".join(path), estimate))
+            return
+        backwards = INVERSE[last]
+        for direction, cell in moves[blank]:
+            if direction == backwards:
+                continue
+            tile = board[cell]
+            board[blank] = tile
+            board[cell] = 0
+            path.append(direction)
+            expand(cell, heuristic.update(tile, cell, blank), direction)
+            path.pop()
+            board[cell] = tile
+            board[blank] = 0
+            heuristic.undo()
+
+    expand(board.index(0), heuristic.reset(board), "")
+    return frontier, min(solutions, key=len) if solutions else None
+
+#per worker process search state, set up by _init_worker
+_WORKER = {}
+
+def default_heuristic(height, width):
+    """
+    The board size's pattern database if built, else Manhattan distance
+    plus linear conflicts
+    Returns a heuristic object
+    """
+    heuristic = patterndb.load(height, width)
+    if heuristic is None:
+        heuristic = ManhattanConflict(height, width)
+    return heuristic
+
+def _init_worker(height, width, board):
+    """
+    Pool initializer: remember the root board and build a heuristic
+    """
+    _WORKER["board"] = board
+    _WORKER["heuristic"] = default_heuristic(height, width)
+    _WORKER["moves"] = neighbors(height, width)
+
+def _search_subtree(task):
+    """
+    Pool task: bounded search below the node reached by a path
+    Returns (FOUND, full path) or (smallest f-value above bound, None)
+    """
+    bound, prefix = task
+    board = list(_WORKER["board"])
+    moves = _WORKER["moves"]
+    blank = board.index(0)
+    for direction in prefix:
+        cell = dict(moves[blank])[direction]
+        board[blank] = board[cell]
+        board[cell] = 0
+        blank = cell
+    heuristic = _WORKER["heuristic"]
+    path = list(prefix)
+    search = _bounded_search(board, heuristic, moves, path)
+    estimate = heuristic.reset(board)
+    result = search(blank, len(prefix), bound, estimate, prefix[-1])
+    if result == FOUND:
+        return FOUND, "".join(path)
+    return result, None
+
+def parallel_ida_star(height, width, board, workers=None, tasks_per_worker=32):
+    """
+    Find a shortest move string like ida_star, searching each
+    iteration's subtrees on a pool of worker processes; uses the
+    default heuristic of solve_optimal
+    Returns a string
+    """
+    assert boards.is_solvable(height, width, board), "puzzle is not solvable"
+    workers = workers or multiprocessing.cpu_count()
+    board = list(board)
+    heuristic = default_heuristic(height, width)
+    moves = neighbors(height, width)
+    #deepen the cut until there are enough subtrees to balance the load
+    depth = 1
+    while True:
+        frontier, solution = _frontier(board, heuristic, moves, depth)
+        if solution is not None:
+            return solution
+        if len(frontier) >= tasks_per_worker * workers or depth >= 20:
+            break
+        depth += 1
+    bound = min(depth + estimate for dummy_path, estimate in frontier)
+    pool = multiprocessing.Pool(workers, _init_worker,
+                                (height, width, board))
+    try:
+        while True:
+            tasks = []
+            smallest = None
+            for prefix, estimate in frontier:
+                cost = depth + estimate
+                if cost <= bound:
+                    tasks.append((bound, prefix))
+                elif smallest is None or cost < smallest:
+                    smallest = cost
+            for result, found in pool.imap_unordered(_search_subtree, tasks):
+                if result == FOUND:
+                    #every subtree shares the bound, so this is optimal
+                    return found
+                if smallest is None or result < smallest:
+                    smallest = result
+            bound = smallest
+    finally:
+        pool.terminate()
+        pool.join()
+
+def is_tractable(height, width):
+    """
+    Whether solve_optimal can be expected to finish on a board size:
+    small boards, and sizes with a distance table or pattern database
+    built for them
+    Returns a boolean
+    """
+    return (height * width <= UNAIDED_CELLS or
+            os.path.exists(distances.default_path(height, width)) or
+            os.path.exists(patterndb.default_path(height, width)))
+
+def solve_optimal(puzzle, heuristic=None, workers=1):
+    """
+    Optimal move string for a Puzzle, leaves the puzzle untouched
+    Reads the answer from the board size's distance table when one has
+    been built, otherwise searches using its pattern database if any,
+    on workers processes (None for one per core)
+    Returns a string
+    """
+    height, width = puzzle.get_height(), puzzle.get_width()
+    if heuristic is None:
+        table = distances.load(height, width)
+        if table is not None:
+            return table.solution(flatten(puzzle))
+        if workers != 1:
+            return parallel_ida_star(height, width, flatten(puzzle), workers)
+        heuristic = patterndb.load(height, width)
+    return ida_star(height, width, flatten(puzzle), heuristic)
@@ -0,0 +1,314 @@
+"""
+Long-lived local solver service
+
+Serves Puzzle.solve_puzzle over a Unix socket or a localhost TCP port,
+so clients skip interpreter start-up for every board.  Requests from
+all connections go through one bounded queue and are solved in small
+batches on a process pool; once the queue is full, connections stop
+being read until it drains, which pushes back on clients through the
+socket itself.
+
+    python server.py --unix /tmp/fifteen.sock
+    python server.py --port 8515 --workers 4
+
+The protocol is one JSON object per line in each direction, answered
+in order per connection:
+
+    {"id": 7, "grid": [[1, 2], [3, 0]], "mode": "greedy"}
+    {"id": 7, "moves": "ul...", "length": 12, "seconds": 0.0001}
+
+A failed request gets an "error" field instead of moves; optimal mode
+is only served for board sizes search.is_tractable accepts, and a line
+longer than LINE_LIMIT bytes is answered with an error and ends the
+connection.  {"op": "metrics"} returns latency percentiles, queue depth and batch
+counts.  benchmarks/bench_server.py generates load against a server.
+"""
+
+import os, sys, json, time, stat, signal, asyncio, argparse, collections
+from concurrent import futures
+
+import batch, search
+
+DEFAULT_PORT = 8515
+
+#longest request or reply line, room for a 1000x1000 board
+LINE_LIMIT = 1 << 26
+
+def solve_batch(requests):
+    """
+    Worker task: solve a list of (grid, mode) pairs, each failure
+    confined to its own result
+    Returns a list of result dictionaries
+    """
+    results = []
+    for grid, mode in requests:
+        try:
+            results.append(batch.solve_grid(grid, mode))
+        except Exception as error:
+            results.append({"error": batch.error_message(error)})
+    return results
+
+def percentiles(samples, points=(50, 90, 99)):
+    """
+    Nearest-rank percentiles of samples, plus the maximum
+    Returns a dictionary, empty if there are no samples
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    result = {}
+    for point in points:
+        rank = max(0, int(round(point / 100.0 * len(ordered))) - 1)
+        result["p%d" % point] = ordered[rank]
+    result["max"] = ordered[-1]
+    return result
+
+class SolverService(object):
+    """
+    Queue, batcher and worker pool behind the socket handlers
+    """
+
+    def __init__(self, workers=None, batch_size=32, batch_delay=0.002,
+                 max_queue=1024, window=10000):
+        """
+        Up to batch_size requests are solved per pool task, waiting at
+        most batch_delay seconds for a batch to fill; max_queue bounds
+        waiting requests and window the latencies kept for percentiles
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._batch_size = batch_size
+        self._batch_delay = batch_delay
+        self._max_queue = max_queue
+        self._latencies = collections.deque(maxlen=window)
+        self._counts = {"requests": 0, "errors": 0, "batches": 0,
+                        "batched_requests": 0, "max_queue_depth": 0,
+                        "backpressure_waits": 0}
+        self._started = time.time()
+        self._queue = None
+        self._slots = None
+        self._pool = None
+        self._batcher = None
+
+    async def start(self):
+        """
+        Start the worker pool and the batcher
+        """
+        self._queue = asyncio.Queue(self._max_queue)
+        #two batches per worker keeps every worker busy between batches
+        self._slots = asyncio.Semaphore(2 * self._workers)
+        self._pool = futures.ProcessPoolExecutor(self._workers)
+        self._batcher = asyncio.ensure_future(self._run_batches())
+
+    def close(self):
+        """
+        Stop the batcher and the worker pool
+        """
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    async def submit(self, grid, mode="greedy"):
+        """
+        Queue a board, waiting for room if the queue is full
+        Returns a future for its result dictionary
+        """
+        result = asyncio.get_event_loop().create_future()
+        if self._queue.full():
+            self._counts["backpressure_waits"] += 1
+        await self._queue.put((grid, mode, time.time(), result))
+        self._counts["requests"] += 1
+        depth = self._queue.qsize()
+        if depth > self._counts["max_queue_depth"]:
+            self._counts["max_queue_depth"] = depth
+        return result
+
+    async def _run_batches(self):
+        """
+        Collect queued requests into batches and hand them to the pool
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await self._slots.acquire()
+            items = [await self._queue.get()]
+            if self._queue.empty() and self._batch_delay:
+                await asyncio.sleep(self._batch_delay)
+            while len(items) < self._batch_size and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            self._counts["batches"] += 1
+            self._counts["batched_requests"] += len(items)
+            task = loop.run_in_executor(
+                self._pool, solve_batch,
+                [(grid, mode) for grid, mode, dummy, dummy in items])
+            task.add_done_callback(
+                lambda task, items=items: self._finish(task, items))
+
+    def _finish(self, task, items):
+        """
+        Resolve the futures of a finished batch
+        """
+        self._slots.release()
+        now = time.time()
+        if task.exception() is not None:
+            results = [{"error": batch.error_message(task.exception())}
+                       ] * len(items)
+        else:
+            results = task.result()
+        for (dummy, dummy, queued, future), result in zip(items, results):
+            self._latencies.append(now - queued)
+            if "error" in result:
+                self._counts["errors"] += 1
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self):
+        """
+        Counters, queue depth and latency percentiles in seconds
+        Returns a dictionary
+        """
+        metrics = dict(self._counts)
+        metrics["queue_depth"] = self._queue.qsize()
+        metrics["queue_limit"] = self._max_queue
+        metrics["workers"] = self._workers
+        metrics["uptime"] = time.time() - self._started
+        metrics["mean_batch"] = (float(metrics["batched_requests"]) /
+                                 max(metrics["batches"], 1))
+        metrics["latency"] = percentiles(self._latencies)
+        return metrics
+
+    async def handle(self, reader, writer):
+        """
+        Serve one connection; requests are read while earlier ones are
+        still being solved, and answered in order
+        """
+        answers = asyncio.Queue()
+        replies = asyncio.ensure_future(self._write_answers(answers, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    #the rest of the line can't be told from the next
+                    #request, so answer and stop reading
+                    await answers.put(self._error(
+                        None, "request line longer than %d bytes" %
+                        LINE_LIMIT))
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await answers.put(await self._answer(line))
+        finally:
+            await answers.put(None)
+            await replies
+            writer.close()
+
+    def _error(self, request_id, message):
+        """
+        Answer a request with an error without solving anything
+        Returns (request id, future for the response dictionary)
+        """
+        done = asyncio.get_event_loop().create_future()
+        done.set_result({"error": message})
+        return request_id, done
+
+    async def _answer(self, line):
+        """
+        Start answering one request line
+        Returns (request id, future for the response dictionary)
+        """
+        try:
+            request = json.loads(line.decode("utf-8"))
+            if not isinstance(request, dict):
+                request = {"grid": request}
+        except ValueError as error:
+            return self._error(None, "bad json: " + str(error))
+        request_id = request.get("id")
+        if request.get("op") == "metrics":
+            done = asyncio.get_event_loop().create_future()
+            done.set_result(self.metrics())
+            return request_id, done
+        if "grid" not in request:
+            return self._error(request_id, "missing grid")
+        grid = request["grid"]
+        error = batch.grid_error(grid)
+        if error is not None:
+            return self._error(request_id, error)
+        mode = request.get("mode", "greedy")
+        if mode == "optimal" and not search.is_tractable(len(grid),
+                                                         len(grid[0])):
+            #IDA* without tables would hold a worker indefinitely
+            return self._error(request_id, "optimal mode needs a distance "
+                               "table or pattern database for %dx%d" %
+                               (len(grid), len(grid[0])))
+        return request_id, await self.submit(grid, mode)
+
+    async def _write_answers(self, answers, writer):
+        """
+        Write responses as they complete, in request order
+        """
+        while True:
+            answer = await answers.get()
+            if answer is None:
+                return
+            request_id, future = answer
+            response = dict(await future)
+            if request_id is not None:
+                response["id"] = request_id
+            writer.write((json.dumps(response) + "\n").encode("utf-8"))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                #client went away; let the reader see end of input
+                return
+
+async def serve(service, unix=None, host="127.0.0.1", port=DEFAULT_PORT):
+    """
+    Run service on a Unix socket path or a TCP port until cancelled
+    or terminated
+    """
+    try:
+        asyncio.get_event_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+    await service.start()
+    if unix is not None:
+        if os.path.exists(unix) and stat.S_ISSOCK(os.stat(unix).st_mode):
+            os.unlink(unix)
+        server = await asyncio.start_unix_server(service.handle, path=unix,
+                                                 limit=LINE_LIMIT)
+    else:
+        server = await asyncio.start_server(service.handle, host, port,
+                                            limit=LINE_LIMIT)
+    sys.stderr.write("serving on %s\n" % (unix or "%s:%d" % (host, port)))
+    try:
+        await server.serve_forever()
+    finally:
+        server.close()
+        service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="local solver service")
+    parser.add_argument("--unix", help="Unix socket path to listen on")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="solver processes (default: one per core)")
+    parser.add_argument("--batch", type=int, default=32,
+                        help="most requests per pool task")
+    parser.add_argument("--delay", type=float, default=0.002,
+                        help="seconds to wait for a batch to fill")
+    parser.add_argument("--max-queue", type=int, default=1024,
+                        help="queued requests before reading pauses")
+    args = parser.parse_args()
+
+    service = SolverService(args.workers, args.batch, args.delay,
+                            args.max_queue)
+    try:
+        asyncio.run(serve(service, args.unix, args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Peephole optimizer for solver output
+
+The greedy solver's macros are correct but wasteful: consecutive
+macros often undo each other's last and first moves, and short runs
+such as the 2x2 "rdlu" cycling have shorter equivalents.  shorten()
+makes one pass over a move string, cancelling moves that reverse the
+previous one and rewriting short windows from a table of shorter
+equivalents, so its time is linear in the length of the string.
+
+Any path of the blank moves tiles the same way wherever it starts, so
+a window can be replaced by a shorter path with the same effect as
+long as the shorter path stays inside the window's bounding box and so
+cannot leave the board where the original did not.
+"""
+
+from moves import OFFSETS, INVERSE
+
+DEFAULT_WINDOW = 8
+
+_TABLES = {}
+
+def _effect(path):
+    """
+    Where the blank ends and which cells' contents moved, relative to
+    the blank's start, along with the bounding box of the blank's path
+    Returns (effect, (min_row, max_row, min_col, max_col))
+    """
+    origin = {}
+    row = col = 0
+    rows = [0]
+    cols = [0]
+    for direction in path:
+        d_row, d_col = OFFSETS[direction]
+        cell = (row + d_row, col + d_col)
+        #the blank's old cell takes whatever sat in the cell it moves to
+        origin[(row, col)] = origin.get(cell, cell)
+        origin[cell] = None
+        row, col = cell
+        rows.append(row)
+        cols.append(col)
+    moved = frozenset((cell, source) for cell, source in origin.items()
+                      if source is not None and source != cell)
+    return ((row, col), moved), (min(rows), max(rows), min(cols), max(cols))
+
+def build_table(max_window=DEFAULT_WINDOW):
+    """
+    Shorter equivalent for every path of up to max_window moves that
+    has one, ignoring paths that reverse a move straight away
+    Returns a dictionary of move string -> move string
+    """
+    paths = [""]
+    layer = [""]
+    for dummy_length in range(max_window):
+        layer = [path + direction for path in layer for direction in "lrud"
+                 if not path or INVERSE[direction] != path[-1]]
+        paths.extend(layer)
+    groups = {}
+    for path in paths:
+        effect, box = _effect(path)
+        groups.setdefault(effect, []).append((len(path), box, path))
+    table = {}
+    for candidates in groups.values():
+        #paths come in order of length, shortest first
+        for length, box, path in candidates:
+            for other_length, other_box, other in candidates:
+                if other_length >= length:
+                    break
+                if (other_box[0] >= box[0] and other_box[1] <= box[1] and
+                        other_box[2] >= box[2] and other_box[3] <= box[3]):
+                    table[path] = other
+                    break
+    return table
+
+def _table(max_window):
+    """
+    Rewrite table for a window size, built once per process
+    Returns (table, sorted window lengths present in it)
+    """
+    if max_window not in _TABLES:
+        table = build_table(max_window)
+        _TABLES[max_window] = (table, sorted(set(len(path)
+                                                 for path in table)))
+    return _TABLES[max_window]
+
+def shorten(move_string, max_window=DEFAULT_WINDOW):
+    """
+    Shorter move string with the same effect as move_string, legal
+    wherever move_string is
+    Returns a string
+    """
+    table, lengths = _table(max_window)
+    moves = []
+    #rewrites go back on the input so they are optimized in turn
+    pending = list(reversed(move_string))
+    while pending:
+        direction = pending.pop()
+        assert direction in INVERSE, "invalid direction: " + direction
+        if moves and moves[-1] == INVERSE[direction]:
+            moves.pop()
+            continue
+        moves.append(direction)
+        for length in lengths:
+            if length > len(moves):
+                break
+            shorter = table.get("".join(moves[-length:]))
+            if shorter is not None:
+                del moves[-length:]
+                pending.extend(reversed(shorter))
+                break
+    return "".join(moves)
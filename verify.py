@@ -0,0 +1,191 @@
+"""
+Vectorized checking of recorded solutions
+
+Applies move strings to many boards at once with NumPy: the boards are
+rows of a 2D array with a vector of blank cells beside it, and each
+step moves every board's blank together.  A board whose move string
+would take the blank off the board (or holds something other than
+l/r/u/d) is frozen at that point and reported as illegal.
+
+Check batch.py output against the boards it was given:
+
+    python verify.py boards.jsonl solutions.jsonl [--chunk N]
+
+Needs numpy.
+"""
+
+import sys, json, time, argparse, itertools
+
+import numpy as np
+
+import batch
+
+#move character -> code; 4 pads short move strings, 5 is invalid
+CODES = np.full(256, 5, dtype=np.uint8)
+for _code, _direction in enumerate("lrud"):
+    CODES[ord(_direction)] = _code
+PAD = 4
+
+def _tables(height, width):
+    """
+    Blank offset per code and legality per (cell, code)
+    Returns (offsets, legal)
+    """
+    offsets = np.array([-1, 1, -width, width, 0, 0], dtype=np.intp)
+    cells = np.arange(height * width)
+    rows, cols = cells // width, cells % width
+    legal = np.stack([cols > 0, cols < width - 1, rows > 0,
+                      rows < height - 1, np.ones_like(cells, dtype=bool),
+                      np.zeros_like(cells, dtype=bool)], axis=1)
+    return offsets, legal
+
+def encode_moves(move_strings):
+    """
+    Move strings as a padded code matrix, longest first so the boards
+    still moving at any step are a prefix of the rows
+    Returns (codes, lengths, order)
+    """
+    lengths = np.array([len(moves) for moves in move_strings], dtype=np.intp)
+    order = np.argsort(-lengths, kind="stable")
+    longest = int(lengths.max()) if len(lengths) else 0
+    codes = np.full((len(move_strings), longest), PAD, dtype=np.uint8)
+    for row, board in enumerate(order):
+        moves = move_strings[board]
+        if moves:
+            codes[row, :len(moves)] = CODES[
+                np.frombuffer(moves.encode("latin-1", "replace"),
+                              dtype=np.uint8)]
+    return codes, lengths[order], order
+
+class BoardBatch(object):
+    """
+    N boards of one size moved in lockstep
+    """
+
+    def __init__(self, height, width, grids):
+        """
+        grids is anything NumPy can shape into N row-major boards,
+        e.g. a list of grids or an (N, height * width) array
+        """
+        self._height = height
+        self._width = width
+        self.boards = np.array(grids, dtype=np.int32).reshape(
+            -1, height * width)
+        self.blanks = np.argmin(self.boards, axis=1)
+        self._offsets, self._legal = _tables(height, width)
+
+    def __len__(self):
+        return len(self.boards)
+
+    def apply(self, move_strings):
+        """
+        Apply one move string per board
+        Returns a boolean array, True where every move was legal
+        """
+        assert len(move_strings) == len(self.boards), "one string per board"
+        codes, lengths, order = encode_moves(move_strings)
+        boards = self.boards[order]
+        blanks = self.blanks[order]
+        legal = np.ones(len(order), dtype=bool)
+        offsets = self._offsets
+        active = len(order)
+        all_rows = np.arange(active)
+        for step in range(codes.shape[1]):
+            #lengths are sorted, so boards with moves left come first
+            while lengths[active - 1] <= step:
+                active -= 1
+            step_codes = codes[:active, step]
+            blank = blanks[:active]
+            ok = legal[:active]
+            ok &= self._legal[blank, step_codes]
+            target = np.where(ok, blank + offsets[step_codes], blank)
+            rows = all_rows[:active]
+            boards[rows, blank] = boards[rows, target]
+            boards[rows, target] = 0
+            blanks[:active] = target
+        self.boards[order] = boards
+        self.blanks[order] = blanks
+        result = np.empty_like(legal)
+        result[order] = legal
+        return result
+
+    def solved(self):
+        """
+        Returns a boolean array, True where a board is in the goal layout
+        """
+        goal = np.arange(self._height * self._width, dtype=self.boards.dtype)
+        return (self.boards == goal).all(axis=1)
+
+def verify(height, width, grids, move_strings):
+    """
+    Apply move_strings to copies of grids
+    Returns (legal, solved) boolean arrays
+    """
+    boards = BoardBatch(height, width, grids)
+    legal = boards.apply(move_strings)
+    return legal, legal & boards.solved()
+
+def verify_stream(board_lines, solution_lines, chunk_size=65536):
+    """
+    Check every solution against its board, a chunk of each board
+    size at a time
+    Yields failure dictionaries, then a summary dictionary last
+    """
+    summary = {"boards": 0, "failures": 0, "moves": 0, "seconds": 0.0}
+    triples = batch.pair_results(board_lines, solution_lines)
+    while True:
+        chunk = list(itertools.islice(triples, chunk_size))
+        if not chunk:
+            break
+        by_size = {}
+        for index, grid, result in chunk:
+            summary["boards"] += 1
+            if result is None or "moves" not in result:
+                summary["failures"] += 1
+                yield {"index": index, "legal": False, "solved": False,
+                       "error": (result or {}).get("error", "no result")}
+                continue
+            error = "bad json" if grid is None else batch.grid_error(grid)
+            if error is not None:
+                summary["failures"] += 1
+                yield {"index": index, "legal": False, "solved": False,
+                       "error": "bad board: " + error}
+                continue
+            size = (len(grid), len(grid[0]))
+            by_size.setdefault(size, []).append(
+                (index, grid, result["moves"]))
+        for (height, width), entries in sorted(by_size.items()):
+            move_strings = [moves for dummy, dummy, moves in entries]
+            start = time.time()
+            legal, solved = verify(height, width,
+                                   [grid for dummy, grid, dummy in entries],
+                                   move_strings)
+            summary["seconds"] += time.time() - start
+            summary["moves"] += sum(len(moves) for moves in move_strings)
+            for (index, dummy, dummy), ok, done in zip(entries, legal, solved):
+                if not done:
+                    summary["failures"] += 1
+                    yield {"index": index, "legal": bool(ok), "solved": False}
+    summary["board_moves_per_second"] = (summary["moves"] /
+                                         max(summary["seconds"], 1e-9))
+    yield summary
+
+def main():
+    parser = argparse.ArgumentParser(description="verify batch solutions")
+    parser.add_argument("boards", help="JSON lines of grids")
+    parser.add_argument("solutions", help="batch.py output for the boards")
+    parser.add_argument("--chunk", type=int, default=65536,
+                        help="boards checked per NumPy batch")
+    args = parser.parse_args()
+
+    with open(args.boards) as board_lines:
+        with open(args.solutions) as solution_lines:
+            for record in verify_stream(board_lines, solution_lines,
+                                        args.chunk):
+                sys.stdout.write(json.dumps(record, sort_keys=True) + "\n")
+                last = record
+    if last["failures"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()